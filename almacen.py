@@ -0,0 +1,181 @@
+"""Almacén local de cotizaciones (SQLite).
+
+Cada diseño se guarda una sola vez bajo el hash de su spec canónica
+(`disenos`); cada vez que se cotiza para un cliente se agrega una fila en
+`cotizaciones` que apunta a ese hash. Un diseño idéntico reusa el resultado
+guardado en lugar de recalcularlo, salvo que lo haya calculado otra versión
+del motor (`VERSION_MOTOR`): ahí se recalcula y se actualiza; los últimos diseños leídos quedan además en
+memoria (LRU acotado), compartidos por todas las sesiones que usan el almacén.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from despiece import VERSION_MOTOR, calcular_despiece, completar_spec
+from tabla import TablaCorte
+
+RUTA_DEFAULT = os.environ.get("CARPINTERIA_DB", "cotizaciones.db")
+MAX_RECIENTES = 256     # diseños que se mantienen en memoria
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS disenos (
+    hash TEXT PRIMARY KEY,
+    ancho REAL, alto REAL, prof REAL, columnas INTEGER,
+    total REAL,
+    version INTEGER NOT NULL DEFAULT 0,
+    spec TEXT NOT NULL,
+    resultado TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cotizaciones (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    hash TEXT NOT NULL REFERENCES disenos(hash),
+    cliente TEXT NOT NULL DEFAULT '',
+    fecha TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_disenos_medidas ON disenos(ancho, alto, prof);
+CREATE INDEX IF NOT EXISTS idx_disenos_total ON disenos(total);
+CREATE INDEX IF NOT EXISTS idx_cotizaciones_cliente ON cotizaciones(cliente COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_cotizaciones_fecha ON cotizaciones(fecha);
+CREATE INDEX IF NOT EXISTS idx_cotizaciones_hash ON cotizaciones(hash);
+"""
+
+# Lo que se guarda del resultado (la tabla columnar se rearma al leer)
+_CLAVES_RESULTADO = ("pz", "buy", "lineal", "err", "nesting", "barras", "costos", "costo", "total")
+
+
+def spec_canonica(spec):
+    """JSON determinístico de la spec completa (con defaults), base del hash."""
+    return json.dumps(completar_spec(spec), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def hash_spec(spec):
+    return hashlib.sha256(spec_canonica(spec).encode()).hexdigest()
+
+
+class Almacen:
+    """Cotizaciones persistidas en un archivo SQLite (seguro entre hilos)."""
+
+    def __init__(self, ruta=RUTA_DEFAULT, max_recientes=MAX_RECIENTES):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        # hash -> (spec, res) de los últimos diseños, del menos al más usado
+        self._recientes = OrderedDict()
+        self.max_recientes = max_recientes
+        self.aciertos = self.fallos = 0
+        self._con = sqlite3.connect(ruta, check_same_thread=False)
+        self._con.row_factory = sqlite3.Row
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.executescript(ESQUEMA)
+        # Bases creadas antes de versionar el motor: sus resultados quedan como versión 0
+        if "version" not in {c["name"] for c in self._con.execute("PRAGMA table_info(disenos)")}:
+            self._con.execute("ALTER TABLE disenos ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def cerrar(self):
+        self._con.close()
+
+    # --- Escritura ---
+    def guardar(self, spec, res, cliente="", fecha=None):
+        """Guarda el diseño (si no existía) y registra la cotización. Devuelve el hash."""
+        s = completar_spec(spec)
+        h = hash_spec(s)
+        datos = json.dumps({k: res.get(k) for k in _CLAVES_RESULTADO}, ensure_ascii=False)
+        with self._lock, self._con:
+            self._con.execute(
+                "INSERT INTO disenos (hash, ancho, alto, prof, columnas, total, version, spec, resultado) VALUES (?,?,?,?,?,?,?,?,?) "
+                "ON CONFLICT(hash) DO UPDATE SET total = excluded.total, version = excluded.version, resultado = excluded.resultado",
+                (h, s["ancho"], s["alto"], s["prof"], len(s["columnas"]), res.get("total"), VERSION_MOTOR, spec_canonica(s), datos))
+            self._con.execute("INSERT INTO cotizaciones (hash, cliente, fecha) VALUES (?,?,?)",
+                              (h, cliente, fecha or datetime.now().isoformat(timespec="seconds")))
+        return h
+
+    def cotizar(self, spec, cliente="", fecha=None):
+        """Cotiza `spec` reusando el resultado guardado si el diseño ya existe.
+
+        Devuelve `(res, hash, reutilizado)`.
+        """
+        h = hash_spec(spec)
+        guardado = self.obtener(h)
+        if guardado:
+            with self._lock, self._con:
+                self._con.execute("INSERT INTO cotizaciones (hash, cliente, fecha) VALUES (?,?,?)",
+                                  (h, cliente, fecha or datetime.now().isoformat(timespec="seconds")))
+            return guardado[1], h, True
+        res = calcular_despiece(spec)
+        h = self.guardar(spec, res, cliente, fecha)
+        self._recordar(h, json.loads(spec_canonica(spec)), res)
+        return res, h, False
+
+    def recotizar(self, h, precios=None, margen=None, cliente=None):
+        """Vuelve a cotizar un diseño guardado con otros precios y/o margen."""
+        spec, _ = self.obtener(h)
+        nueva = {**spec, "precios": {**spec["precios"], **(precios or {})}}
+        if margen is not None: nueva["margen"] = margen
+        if cliente is None: cliente = self.ultimo_cliente(h)
+        return self.cotizar(nueva, cliente)
+
+    # --- Lectura ---
+    def obtener(self, h):
+        """`(spec, res)` de un diseño guardado, o `None` (compartidos: de sólo lectura).
+
+        Si el resultado lo calculó otra versión del motor se recalcula desde la
+        spec guardada y se actualiza la fila.
+        """
+        with self._lock:
+            if h in self._recientes:
+                self._recientes.move_to_end(h); self.aciertos += 1
+                return self._recientes[h]
+            self.fallos += 1
+            fila = self._con.execute("SELECT spec, resultado, version FROM disenos WHERE hash = ?", (h,)).fetchone()
+        if fila is None: return None
+        spec = json.loads(fila["spec"])
+        if fila["version"] != VERSION_MOTOR:
+            res = calcular_despiece(spec)
+            datos = json.dumps({k: res.get(k) for k in _CLAVES_RESULTADO}, ensure_ascii=False)
+            with self._lock, self._con:
+                self._con.execute("UPDATE disenos SET total = ?, version = ?, resultado = ? WHERE hash = ?", (res.get("total"), VERSION_MOTOR, datos, h))
+            return self._recordar(h, spec, res)
+        res = json.loads(fila["resultado"])
+        res["tabla"] = TablaCorte.desde_pz(res["pz"]) if not res["err"] else None
+        return self._recordar(h, spec, res)
+
+    def _recordar(self, h, spec, res):
+        with self._lock:
+            self._recientes[h] = (spec, res)
+            self._recientes.move_to_end(h)
+            while len(self._recientes) > self.max_recientes: self._recientes.popitem(last=False)
+        return spec, res
+
+    def info_recientes(self):
+        """Aciertos, fallos y tamaño de la caché en memoria (como `cache_info` de lru_cache)."""
+        with self._lock:
+            return {"aciertos": self.aciertos, "fallos": self.fallos, "tamano": len(self._recientes), "max": self.max_recientes}
+
+    def ultimo_cliente(self, h):
+        with self._lock:
+            fila = self._con.execute("SELECT cliente FROM cotizaciones WHERE hash = ? ORDER BY fecha DESC, id DESC LIMIT 1", (h,)).fetchone()
+        return fila["cliente"] if fila else ""
+
+    def buscar(self, cliente=None, desde=None, hasta=None, ancho=None, alto=None, prof=None,
+               total_min=None, total_max=None, limite=200):
+        """Cotizaciones que cumplen los filtros, de la más reciente a la más vieja.
+
+        `cliente` busca por prefijo sin distinguir mayúsculas; `desde`/`hasta`
+        son fechas ISO; las medidas son exactas.
+        """
+        cond, args = [], []
+        if cliente: cond.append("c.cliente LIKE ? COLLATE NOCASE"); args.append(f"{cliente}%")
+        if desde: cond.append("c.fecha >= ?"); args.append(str(desde))
+        if hasta: cond.append("c.fecha < ?"); args.append(str(hasta))
+        for col, val in (("ancho", ancho), ("alto", alto), ("prof", prof)):
+            if val is not None: cond.append(f"d.{col} = ?"); args.append(val)
+        if total_min is not None: cond.append("d.total >= ?"); args.append(total_min)
+        if total_max is not None: cond.append("d.total <= ?"); args.append(total_max)
+        sql = ("SELECT c.id, c.cliente, c.fecha, d.hash, d.ancho, d.alto, d.prof, d.columnas, d.total "
+               "FROM cotizaciones c JOIN disenos d ON d.hash = c.hash"
+               + (" WHERE " + " AND ".join(cond) if cond else "") + " ORDER BY c.fecha DESC, c.id DESC LIMIT ?")
+        with self._lock:
+            return [dict(f) for f in self._con.execute(sql, (*args, limite))]
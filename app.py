@@ -1,10 +1,33 @@
+import io
+import os
+from collections import deque
+from datetime import timedelta
+
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import math
+import dibujo
+import vista3d
+from almacen import Almacen
+from barrido import barrer
+from despiece import cargar_precios, diff_despiece, params_corredera
+from exportar import FORMATOS, escribir_despiece
+from nesting import PLACA_ANCHO, PLACA_LARGO, placas_heuristica
+from perfil import Corrida, a_json
+from proyecto import despiece_proyecto
+from restricciones import FRENTE_MIN, HUECO_MIN, alto_minimo, max_cajones, tabla_factibilidad
 
 st.set_page_config(page_title="CarpinterIA: V22 Closet Master", page_icon="🪚", layout="wide")
 
+# Tiempos por fase: cada rerun completo abre una corrida; los del fragmento de diseño, la suya
+corrida = st.session_state["corrida"] = Corrida("app")
+historial_perf = st.session_state.setdefault("historial_perf", deque(maxlen=50))
+
+# Lo que no depende de la sesión se calcula una vez para todo el salón de ventas:
+# las cachés de Streamlit (y las lru_cache del motor) son del proceso y con LRU acotado.
+@st.cache_data(ttl=600, max_entries=1, show_spinner=False)
+def lista_precios():
+    # CARPINTERIA_PRECIOS: JSON opcional con la lista vigente (se relee cada 10 min)
+    return cargar_precios(os.environ.get("CARPINTERIA_PRECIOS"))
+
 # ==============================================================================
 # 1. BARRA LATERAL
 # ==============================================================================
@@ -26,12 +49,9 @@ with st.sidebar:
     tipo_corredera = st.selectbox("Correderas Cajón", ["Telescópicas", "Comunes (Z)", "Push / Tip-On"])
     es_push = "Push" in tipo_corredera
     
-    if "Telescópicas" in tipo_corredera or "Push" in tipo_corredera:
-        descuento_guia = 26 
-        costo_guia_ref = 6500
-    else:
-        descuento_guia = 25 
-        costo_guia_ref = 2500
+    # El precio de guía que se edita es el del tipo de corredera elegido (mismo criterio que el motor)
+    lp = lista_precios()
+    _, clave_guia = params_corredera(tipo_corredera)
 
     tipo_bisagra = st.selectbox("Bisagras Lateral", ["Codo 0 (Ext)", "Codo 9 (Media)", "Codo 18 (Int)", "Push"])
     
@@ -39,42 +59,144 @@ with st.sidebar:
     
     # Costos
     with st.expander("💲 Lista de Precios"):
-        precio_placa = st.number_input("Placa Melamina ($)", value=85000, step=1000)
-        precio_fondo = st.number_input("Placa Fondo ($)", value=25000, step=1000)
-        precio_canto = st.number_input("Metro Canto ($)", value=800, step=50)
-        st.caption("Herrajes Unitarios:")
-        c_bis = st.number_input("Bisagra ($)", value=2500, step=100)
-        c_guia = st.number_input("Par Guías base ($)", value=costo_guia_ref, step=500)
-        c_piston = st.number_input("Pistón a Gas ($)", value=4500, step=500)
-        c_kit = st.number_input("Kit Placard (x Metro) ($)", value=15000, step=1000)
-        margen = st.number_input("Margen Ganancia", value=2.5, step=0.1)
+        # En un form: editar precios no re-ejecuta la app hasta aplicar
+        with st.form("precios", border=False):
+            precio_placa = st.number_input("Placa Melamina ($)", value=lp["placa"], step=1000)
+            precio_fondo = st.number_input("Placa Fondo ($)", value=lp["fondo"], step=1000)
+            precio_canto = st.number_input("Metro Canto ($)", value=lp["canto"], step=50)
+            st.caption("Herrajes Unitarios:")
+            c_bis = st.number_input("Bisagra ($)", value=lp["bisagra"], step=100)
+            c_guia = st.number_input("Par Guías base ($)", value=lp[clave_guia], step=500)
+            c_piston = st.number_input("Pistón a Gas ($)", value=lp["piston"], step=500)
+            c_kit = st.number_input("Kit Placard herrajes (x Metro) ($)", value=lp["kit"], step=1000)
+            c_riel = st.number_input("Riel Placard (barra 3m) ($)", value=lp["riel"], step=500)
+            c_barral = st.number_input("Barral (tubo 3m) ($)", value=lp["barral"], step=500)
+            margen = st.number_input("Margen Ganancia", value=float(lp["margen"]), step=0.1)
+            st.form_submit_button("Aplicar precios")
+
+    debug_perf = st.toggle("🐞 Panel de rendimiento", key="debug_perf")
 
 # ==============================================================================
-# 2. LAYOUT
+# 2. GRÁFICO CON PLACARD OVERLAY
 # ==============================================================================
-contenedor_grafico = st.container()
-st.divider()
-contenedor_controles = st.container()
-st.divider()
-contenedor_boton = st.container()
+# Sólo depende de sus argumentos: un cambio en precios o herrajes no redibuja.
+dibujar_mueble = st.cache_data(max_entries=64, show_spinner=False)(dibujo.dibujar_mueble)
+# La vista 3D son unas pocas mallas (una por categoría de pieza), cacheadas igual
+dibujar_3d = st.cache_data(max_entries=32, show_spinner=False)(vista3d.figura_3d)
+
+# Sobre este umbral de módulos la vista 3D del proyecto arranca en baja resolución
+MODULOS_BAJA_RES = 10
 
 # ==============================================================================
 # 3. CONTROLES DE DISEÑO
 # ==============================================================================
-configuracion_columnas = []
+def ui_interior(s):
+    with st.expander("Interior (Detrás de puerta abatible)"):
+        t = st.selectbox("Tipo", ["Vacío", "Estantes", "Cubos"], key=f"t_{s}")
+        d = {}
+        if t=="Estantes": d={"tipo":"Estantes","cant":st.number_input("Cant.",1,10,3,key=f"e_{s}")}
+        elif t=="Cubos":
+            c1,c2=st.columns(2)
+            d={"tipo":"Cubos","cols":c1.number_input("Cols",1,5,2,key=f"cc_{s}"),"rows":c2.number_input("Filas",1,10,3,key=f"cr_{s}")}
+        return d
+
+def ui_puerta_detalles(s, label):
+    st.markdown(f"**Configuración {label}**")
+    c1, c2 = st.columns(2)
+    apertura = c1.selectbox("Apertura", ["Lateral (Bisagra)", "Rebatible Arriba (Pistón)", "Rebatible Abajo (Pistón)"], key=f"ap_{s}")
+    montaje = c2.selectbox("Montaje", ["Externa (Sobrepuesta)", "Interna (Dentro)"], key=f"mnt_{s}")
+    doble = False
+    if "Lateral" in apertura:
+        doble = st.checkbox("Doble Hoja", False, key=f"d_{s}")
+    return {"apertura": apertura, "montaje": montaje, "doble": doble, "interior": ui_interior(s)}
+
+def ui_columna(i, fact, espesor):
+    modo_col = st.radio(f"Estructura C{i+1}", ["Dividida", "Entera"], horizontal=True, label_visibility="collapsed", key=f"m_{i}")
+    
+    detalles_inf = {}
+    detalles_sup = {}
+    tipo_inf = "Vacío"
+    tipo_sup = "Vacío"
+
+    # === MODO ENTERO ===
+    if "Entera" in modo_col:
+        h_util = fact.alto_util
+        # Sólo se ofrece lo que el despiece va a aceptar
+        opciones = ["Vacío", "Cajonera", "Puerta Entera", "Estantes", "Barral"] if max_cajones(fact, h_util) else ["Vacío", "Puerta Entera", "Estantes", "Barral"]
+        tipo_inf = st.selectbox("Componente Único", opciones, key=f"ent_{i}")
+        
+        if tipo_inf == "Cajonera":
+            max_c = max_cajones(fact, h_util)
+            cant = st.number_input("Cant.", 1, max_c, min(6, max_c), key=f"qe_{i}")
+            detalles_inf = {"alto": h_util, "cant": cant}
+        elif tipo_inf == "Puerta Entera":
+            detalles_inf = ui_puerta_detalles(f"ent_{i}", "Puerta")
+            detalles_inf["alto"] = h_util
+        elif tipo_inf == "Estantes": 
+            detalles_sup={"cant":st.number_input("Cant.",1,15,5,key=f"es_{i}")}
+            tipo_sup="Estantes"; tipo_inf="Vacío"
+        elif tipo_inf == "Barral": 
+            tipo_sup="Barral"; tipo_inf="Vacío"
+
+    # === MODO DIVIDIDO ===
+    else:
+        c1, c2 = st.columns(2)
+        with c1:
+            st.markdown("🔽 **Abajo**")
+            h_mod = st.number_input("Alto (mm)", 0, fact.alto_util, min(720, fact.alto_util), step=10, key=f"h_{i}")
+            # Sólo se ofrece lo que entra en ese alto (descontado el estante fijo)
+            opciones = ["Vacío"] + (["Cajonera"] if max_cajones(fact, h_mod - espesor) else []) + (["Puerta Baja"] if h_mod - espesor >= FRENTE_MIN else [])
+            tipo_inf = st.selectbox("Tipo", opciones, key=f"inf_{i}")
+
+            if tipo_inf == "Cajonera":
+                max_c = max_cajones(fact, h_mod - espesor)
+                cant = st.number_input("Cant.", 1, max_c, min(3, max_c), key=f"qi_{i}")
+                detalles_inf = {"alto": h_mod, "cant": cant}
+            elif tipo_inf == "Puerta Baja":
+                detalles_inf = ui_puerta_detalles(f"inf_{i}", "Puerta Baja")
+                detalles_inf["alto"] = h_mod
+            else:
+                detalles_inf = {"alto": h_mod}
+
+        with c2:
+            st.markdown("🔼 **Arriba**")
+            h_rest = fact.alto_util - h_mod
+            st.caption(f"Libre: {h_rest}mm")
+            
+            if h_rest > FRENTE_MIN:
+                opciones = ["Vacío", "Estantes", "Barral", "Puerta Alta"] + (["Cajonera"] if max_cajones(fact, h_rest) else [])
+                tipo_sup = st.selectbox("Tipo", opciones, key=f"sup_{i}")
+                if tipo_sup == "Cajonera":
+                    max_c = max_cajones(fact, h_rest)
+                    cant = st.number_input("Cant.", 1, max_c, min(2, max_c), key=f"qs_{i}")
+                    detalles_sup = {"cant": cant}
+                elif tipo_sup == "Estantes":
+                    cant = st.number_input("Cant.", 1, 10, 3, key=f"qe_{i}")
+                    detalles_sup = {"cant": cant}
+                elif tipo_sup == "Puerta Alta":
+                    detalles_sup = ui_puerta_detalles(f"sup_{i}", "Puerta Alta")
+            else:
+                st.error("Sin espacio")
+                tipo_sup = "Vacío"
 
-def get_limit(h):
-    if h <= 0: return 1
-    return max(1, int(h / 75))
+    return {"inf_tipo": tipo_inf, "inf_data": detalles_inf, "sup_tipo": tipo_sup, "sup_data": detalles_sup, "modo": modo_col}
 
-with contenedor_controles:
+# El panel de diseño corre como fragmento: editar una columna re-ejecuta sólo
+# el panel (no la barra lateral ni los resultados) y deja el diseño en session_state.
+@st.fragment
+def panel_diseno(espesor, zocalo, es_push, tipo_corredera):
+    # En un rerun sólo del fragmento la corrida de la app ya está cerrada
+    corrida = st.session_state["corrida"]
+    if corrida.total_ms is not None: corrida = Corrida("diseno")
+    contenedor_grafico = st.container()
+    st.divider()
     col_medidas, col_distribucion = st.columns([1, 2])
     
     # --- Medidas Generales y Placard Global ---
     with col_medidas:
         st.subheader("1. Casco General")
         ancho = st.number_input("Ancho Total (mm)", value=1600, step=10)
-        alto = st.number_input("Alto Total (mm)", value=2000, step=10)
+        alto = st.number_input("Alto Total (mm)", min_value=alto_minimo(zocalo, espesor), value=2000, step=10, key="alto")
         prof = st.number_input("Profundidad Externa (mm)", value=600, step=10)
         
         st.markdown("---")
@@ -88,345 +210,242 @@ with contenedor_controles:
                 st.error("⚠️ Alerta: Profundidad menor a 600mm. Las prendas colgadas chocarán con las puertas corredizas (los rieles ocupan ~85mm).")
         
         st.markdown("---")
-        cant_columnas = st.number_input("Cantidad de Columnas Internas", min_value=1, max_value=5, value=2, step=1)
+        # Rangos válidos precalculados para este casco (columnas, cajones, guías)
+        fact = tabla_factibilidad(ancho, alto, prof, zocalo, espesor, tiene_placard)
+        max_cols = min(5, max(1, fact.max_columnas))
+        if fact.max_columnas < 1: st.error(f"Ancho insuficiente: cada columna necesita al menos {HUECO_MIN}mm.")
+        cant_columnas = st.number_input("Cantidad de Columnas Internas", min_value=1, max_value=max_cols, value=min(2, max_cols), step=1)
+        st.caption(f"Guías de cajón: {fact.largo_guia}mm")
 
     # --- Configuración por Columna ---
     with col_distribucion:
         st.subheader("2. Diseño Interno")
         tabs = st.tabs([f"Col {i+1}" for i in range(cant_columnas)])
         
-        for i, tab in enumerate(tabs):
-            with tab:
-                modo_col = st.radio(f"Estructura C{i+1}", ["Dividida", "Entera"], horizontal=True, label_visibility="collapsed", key=f"m_{i}")
-                
-                detalles_inf = {}
-                detalles_sup = {}
-                tipo_inf = "Vacío"
-                tipo_sup = "Vacío"
-
-                def ui_interior(s):
-                    with st.expander("Interior (Detrás de puerta abatible)"):
-                        t = st.selectbox("Tipo", ["Vacío", "Estantes", "Cubos"], key=f"t_{s}")
-                        d = {}
-                        if t=="Estantes": d={"tipo":"Estantes","cant":st.number_input("Cant.",1,10,3,key=f"e_{s}")}
-                        elif t=="Cubos":
-                            c1,c2=st.columns(2)
-                            d={"tipo":"Cubos","cols":c1.number_input("Cols",1,5,2,key=f"cc_{s}"),"rows":c2.number_input("Filas",1,10,3,key=f"cr_{s}")}
-                        return d
-
-                def ui_puerta_detalles(s, label):
-                    st.markdown(f"**Configuración {label}**")
-                    c1, c2 = st.columns(2)
-                    apertura = c1.selectbox("Apertura", ["Lateral (Bisagra)", "Rebatible Arriba (Pistón)", "Rebatible Abajo (Pistón)"], key=f"ap_{s}")
-                    montaje = c2.selectbox("Montaje", ["Externa (Sobrepuesta)", "Interna (Dentro)"], key=f"mnt_{s}")
-                    doble = False
-                    if "Lateral" in apertura:
-                        doble = st.checkbox("Doble Hoja", False, key=f"d_{s}")
-                    return {"apertura": apertura, "montaje": montaje, "doble": doble, "interior": ui_interior(s)}
-
-                # === MODO ENTERO ===
-                if "Entera" in modo_col:
-                    tipo_inf = st.selectbox("Componente Único", ["Vacío", "Cajonera", "Puerta Entera", "Estantes", "Barral"], key=f"ent_{i}")
-                    h_util = alto - zocalo
-                    
-                    if tipo_inf == "Cajonera":
-                        max_c = get_limit(h_util)
-                        cant = st.number_input("Cant.", 1, max_c, min(6, max_c), key=f"qe_{i}")
-                        detalles_inf = {"alto": h_util, "cant": cant}
-                    elif tipo_inf == "Puerta Entera":
-                        detalles_inf = ui_puerta_detalles(f"ent_{i}", "Puerta")
-                        detalles_inf["alto"] = h_util
-                    elif tipo_inf == "Estantes": 
-                        detalles_sup={"cant":st.number_input("Cant.",1,15,5,key=f"es_{i}")}
-                        tipo_sup="Estantes"; tipo_inf="Vacío"
-                    elif tipo_inf == "Barral": 
-                        tipo_sup="Barral"; tipo_inf="Vacío"
-
-                # === MODO DIVIDIDO ===
-                else:
-                    c1, c2 = st.columns(2)
-                    with c1:
-                        st.markdown("🔽 **Abajo**")
-                        tipo_inf = st.selectbox("Tipo", ["Vacío", "Cajonera", "Puerta Baja"], key=f"inf_{i}")
-                        h_mod = st.number_input("Alto (mm)", value=720, step=10, key=f"h_{i}")
-                        
-                        if tipo_inf == "Cajonera":
-                            max_c = get_limit(h_mod)
-                            cant = st.number_input("Cant.", 1, max_c, min(3, max_c), key=f"qi_{i}")
-                            detalles_inf = {"alto": h_mod, "cant": cant}
-                        elif tipo_inf == "Puerta Baja":
-                            detalles_inf = ui_puerta_detalles(f"inf_{i}", "Puerta Baja")
-                            detalles_inf["alto"] = h_mod
-                        else:
-                            detalles_inf = {"alto": h_mod}
-
-                    with c2:
-                        st.markdown("🔼 **Arriba**")
-                        h_rest = alto - zocalo - h_mod
-                        st.caption(f"Libre: {h_rest}mm")
-                        
-                        if h_rest > 70:
-                            tipo_sup = st.selectbox("Tipo", ["Vacío", "Estantes", "Barral", "Puerta Alta", "Cajonera"], key=f"sup_{i}")
-                            if tipo_sup == "Cajonera":
-                                max_c = get_limit(h_rest)
-                                cant = st.number_input("Cant.", 1, max_c, min(2, max_c), key=f"qs_{i}")
-                                detalles_sup = {"cant": cant}
-                            elif tipo_sup == "Estantes":
-                                cant = st.number_input("Cant.", 1, 10, 3, key=f"qe_{i}")
-                                detalles_sup = {"cant": cant}
-                            elif tipo_sup == "Puerta Alta":
-                                detalles_sup = ui_puerta_detalles(f"sup_{i}", "Puerta Alta")
-                        else:
-                            st.error("Sin espacio")
-                            tipo_sup = "Vacío"
-
-                configuracion_columnas.append({"inf_tipo": tipo_inf, "inf_data": detalles_inf, "sup_tipo": tipo_sup, "sup_data": detalles_sup, "modo": modo_col})
+        configuracion_columnas = []
+        with corrida.fase("widgets_columnas", columnas=cant_columnas):
+            for i, tab in enumerate(tabs):
+                with tab: configuracion_columnas.append(ui_columna(i, fact, espesor))
+
+    with contenedor_grafico:
+        c1, c2, c3 = st.columns([2, 1, 1])
+        vista = c1.radio("Vista", ["Frente", "3D"], horizontal=True, label_visibility="collapsed", key="vista")
+        if vista == "3D":
+            explotada = c2.toggle("Explotada", key="explotada")
+            baja = c3.toggle("Baja resolución", key="baja_res", help="Sin herrajes, cajas de cajón ni piezas chicas")
+            modulo = {"ancho": ancho, "alto": alto, "prof": prof, "espesor": espesor, "zocalo": zocalo, "tipo_corredera": tipo_corredera,
+                      "tiene_placard": tiene_placard, "hojas_placard": hojas_placard, "columnas": configuracion_columnas}
+            with corrida.fase("vista_3d", columnas=cant_columnas):
+                fig = dibujar_3d([modulo], explotada, baja, f"Vista 3D {ancho}x{alto}x{prof}mm")
+        else:
+            with corrida.fase("dibujar_mueble", columnas=cant_columnas):
+                fig = dibujar_mueble(ancho, alto, zocalo, cant_columnas, configuracion_columnas, espesor, es_push, tiene_placard, hojas_placard)
+        with corrida.fase("plotly_chart"): st.plotly_chart(fig, use_container_width=True)
+    corrida.anotar(medidas=f"{ancho}x{alto}x{prof}", columnas=cant_columnas)
+
+    st.session_state["diseno"] = {
+        "ancho": ancho, "alto": alto, "prof": prof,
+        "tiene_placard": tiene_placard, "hojas_placard": hojas_placard,
+        "columnas": configuracion_columnas,
+    }
+    if corrida.tipo == "diseno": st.session_state["historial_perf"].append(corrida.cerrar().a_dict())
 
 # ==============================================================================
-# 4. GRÁFICO CON PLACARD OVERLAY
+# 4. LAYOUT
 # ==============================================================================
-def dibujar_mueble(ancho, alto, zocalo, columnas, configs, espesor_mat, es_push, flag_placard, num_hojas):
-    fig = go.Figure()
-    fig.update_layout(margin=dict(t=30, b=0, l=0, r=0), height=350, xaxis=dict(visible=False, range=[-50, ancho+50]), yaxis=dict(visible=False, scaleanchor="x", scaleratio=1, range=[-50, alto+50]), plot_bgcolor="white", title=f"Vista {ancho}x{alto}mm")
-
-    # Casco Externo
-    fig.add_shape(type="rect", x0=0, y0=0, x1=ancho, y1=zocalo, fillcolor="#2C3E50", line=dict(color="black"))
-    fig.add_shape(type="rect", x0=0, y0=zocalo, x1=ancho, y1=alto, line=dict(color="#5D4037", width=4))
-    
-    ancho_col = ancho / columnas
-    
-    def manija(cx, cy, orientacion="v"):
-        if not es_push: 
-            if orientacion=="v": fig.add_shape(type="line", x0=cx, y0=cy-15, x1=cx, y1=cy+15, line=dict(color="#154360", width=4))
-            else: fig.add_shape(type="line", x0=cx-15, y0=cy, x1=cx+15, y1=cy, line=dict(color="#154360", width=4))
-
-    def interior(x0, x1, y0, h, d):
-        if not d: return
-        t=d.get("tipo")
-        if t=="Estantes":
-            c=d["cant"]; p=h/(c+1)
-            for k in range(c): y=y0+(p*(k+1)); fig.add_shape(type="line", x0=x0+5, y0=y, x1=x1-5, y1=y, line=dict(color="#A04000", width=2, dash="dot"))
-        elif t=="Cubos":
-            cols=d["cols"]; rows=d["rows"]
-            ph=h/rows; pw=(x1-x0)/cols
-            for r in range(1,rows): y=y0+(ph*r); fig.add_shape(type="line", x0=x0+5, y0=y, x1=x1-5, y1=y, line=dict(color="#A04000", width=2, dash="dot"))
-            for c in range(1,cols): x=x0+(pw*c); fig.add_shape(type="line", x0=x, y0=y0+5, x1=x, y1=y0+h-5, line=dict(color="#A04000", width=2, dash="dot"))
-
-    # DIBUJO DE COLUMNAS INTERNAS
-    for i, conf in enumerate(configs):
-        xs = i * ancho_col; xe = (i + 1) * ancho_col; yc = zocalo 
-        if i < columnas: fig.add_shape(type="line", x0=xe, y0=zocalo, x1=xe, y1=alto, line=dict(color="#5D4037", width=2))
-
-        if "Dividida" in conf["modo"]:
-            y_div = zocalo + conf["inf_data"]["alto"]
-            fig.add_shape(type="rect", x0=xs, y0=y_div-espesor_mat, x1=xe, y1=y_div, fillcolor="#8B4513", line=dict(width=0))
-
-        def dibujar_bloque(tipo, data, y_start, h_bloque):
-            if tipo == "Cajonera":
-                c=data["cant"]
-                if c > 0:
-                    hu=h_bloque/c
-                    for k in range(c): 
-                        yp=y_start+(k*hu)
-                        fig.add_shape(type="rect", x0=xs+3, y0=yp+2, x1=xe-3, y1=yp+hu-2, fillcolor="#85C1E9", line=dict(color="#2E86C1"))
-                        manija(xs+ancho_col/2, yp+hu/2, "h")
-
-            elif "Puerta" in tipo:
-                interior(xs, xe, y_start, h_bloque, data.get("interior"))
-                colf="rgba(171, 235, 198, 0.6)" if "Baja" in tipo else "rgba(210, 180, 222, 0.6)"
-                dob=data.get("doble"); ap=data.get("apertura", "Lateral")
-                
-                fig.add_shape(type="rect", x0=xs+3, y0=y_start+2, x1=xe-3, y1=y_start+h_bloque-2, fillcolor=colf, line=dict(color="gray"))
-                
-                if dob: 
-                    mid=xs+ancho_col/2
-                    fig.add_shape(type="line", x0=mid, y0=y_start+2, x1=mid, y1=y_start+h_bloque-2, line=dict(color="gray", width=1))
-                    manija(mid-15, y_start+h_bloque/2); manija(mid+15, y_start+h_bloque/2)
-                else: 
-                    if "Arriba" in ap: manija(xs+ancho_col/2, y_start+30, "h")
-                    elif "Abajo" in ap: manija(xs+ancho_col/2, y_start+h_bloque-30, "h")
-                    else: 
-                        px=xe-20 if i%2==0 else xs+20
-                        manija(px, y_start+h_bloque/2)
-
-            elif tipo == "Estantes": interior(xs, xe, y_start, h_bloque, {"tipo":"Estantes","cant":data["cant"]})
-            elif tipo == "Barral": 
-                yb=y_start+(h_bloque*0.2) if h_bloque<500 else y_start+100
-                fig.add_shape(type="line", x0=xs+10, y0=yb, x1=xe-10, y1=yb, line=dict(color="gray", width=5))
-                fig.add_annotation(x=xs+ancho_col/2, y=yb-30, text="👕", showarrow=False)
-
-        # INFERIOR
-        h_inf = conf["inf_data"].get("alto", 0)
-        h_util_inf = h_inf - espesor_mat if "Dividida" in conf["modo"] else h_inf
-        dibujar_bloque(conf["inf_tipo"], conf["inf_data"], yc, h_util_inf)
-        yc += h_inf
-
-        # SUPERIOR
-        rest = alto - yc
-        if rest > 0:
-            dibujar_bloque(conf["sup_tipo"], conf["sup_data"], yc, rest)
-
-    # NUEVO: DIBUJAR PLACARD SOBREPUESTO AL FINAL (Para que se vea translucido encima)
-    if flag_placard:
-        h_hoja = alto - zocalo
-        ancho_h_visual = ancho / num_hojas
-        
-        # Color aluminio translucido
-        color_vidrio = "rgba(220, 230, 235, 0.7)" 
-        color_perfil = "#707B7C"
-        
-        # Rieles
-        fig.add_shape(type="line", x0=0, y0=zocalo, x1=ancho, y1=zocalo, line=dict(color=color_perfil, width=6))
-        fig.add_shape(type="line", x0=0, y0=alto, x1=ancho, y1=alto, line=dict(color=color_perfil, width=6))
-
-        for h in range(num_hojas):
-            xh = h * ancho_h_visual
-            # Para simular el cruce en 3D, ampliamos ligeramente la visual de la hoja
-            fig.add_shape(type="rect", x0=xh, y0=zocalo+3, x1=xh+ancho_h_visual+15, y1=alto-3, fillcolor=color_vidrio, line=dict(color=color_perfil, width=2))
-            # Perfil Manijón Aluminio
-            fig.add_shape(type="line", x0=xh+10, y0=zocalo+10, x1=xh+10, y1=alto-10, line=dict(color="#515A5A", width=4))
-
-    return fig
-
-with contenedor_grafico: st.plotly_chart(dibujar_mueble(ancho, alto, zocalo, cant_columnas, configuracion_columnas, espesor, es_push, tiene_placard, hojas_placard), use_container_width=True)
+panel_diseno(espesor, zocalo, es_push, tipo_corredera)
+st.divider()
+contenedor_boton = st.container()
 
 # ==============================================================================
 # 5. CÁLCULO Y DESPIECE
 # ==============================================================================
+@st.cache_resource
+def get_almacen():
+    return Almacen()
+
+def tabla_df(filas):
+    # pandas se importa recién cuando hay una tabla para mostrar
+    import pandas as pd
+    return pd.DataFrame(filas)
+
+def mostrar_resultado(res, clave, nombre_csv="corte_v22.csv", pz_anterior=None):
+    """Pestañas de corte, herrajes, costo y (si hay `pz_anterior`) cambios."""
+    pz, buy = res["pz"], res["buy"]
+    nombres = ["Corte & Cantos","Herrajes","$$$"] + (["Cambios"] if pz_anterior is not None else [])
+    t1,t2,t3,*t4=st.tabs(nombres)
+    with t1: 
+        df = res["tabla"].a_dataframe()
+        if "Modulo" in pz[0]: df.insert(0, "Modulo", [p["Modulo"] for p in pz])
+        with corrida.fase("tabla_estilo", vista=clave, filas=len(df)):
+            st.dataframe(df.style.format({"Largo": "{:.0f}", "Ancho": "{:.0f}"}), use_container_width=True)
+        # Formatos del taller: genérico, optimizador o seccionadora (veta y cantos por lado)
+        c1, c2 = st.columns([1, 2])
+        formato = c1.selectbox("Formato", list(FORMATOS), key=f"fmt_{clave}", label_visibility="collapsed")
+        with corrida.fase("csv", vista=clave, filas=len(df), formato=formato):
+            buf = io.StringIO(); nombre = nombre_csv.removesuffix(".csv")
+            escribir_despiece(buf, pz, formato, nombre)
+            c2.download_button("📥 Bajar CSV", buf.getvalue().encode(), nombre_csv if formato == "csv" else f"{nombre}_{formato}.csv", key=f"csv_{clave}")
+    with t2, corrida.fase("herrajes_groupby", vista=clave, filas=len(buy)):
+        st.dataframe(tabla_df(buy).groupby(["Item","Unidad"], as_index=False).sum(), use_container_width=True)
+    with t3: 
+        st.metric("Total", f"${res['total']:,.0f}")
+        cs = res["costos"]
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Placas", f"${cs['costo_placas']:,.0f}", f"{cs['placas']} u. · {cs['area_mela_m2']:.1f} m²", delta_color="off")
+        c2.metric("Canto", f"${cs['costo_canto']:,.0f}", f"{cs['canto_ml']:.1f} ml", delta_color="off")
+        c3.metric("Herrajes", f"${cs['costo_herrajes']:,.0f}")
+        for mat, r in res["nesting"].items():
+            st.write(f"**{mat}**: {r['placas']} placas de {PLACA_LARGO}x{PLACA_ANCHO} (estimación por área: {placas_heuristica([p for p in pz if p['Mat']==mat])})")
+            if r["sin_lugar"]: st.warning(f"No entran en una placa: {', '.join(r['sin_lugar'])}")
+            n = st.selectbox("Placa", range(1, len(r["hojas"])+1), key=f"placa_{clave}_{mat}")
+            st.plotly_chart(dibujo.dibujar_placa(r["hojas"][n-1]), use_container_width=True, key=f"hoja_{clave}_{mat}")
+        if res.get("barras"):
+            st.write("**Materiales lineales** (rieles y barrales en barras de 3m, canto en rollos)")
+            st.dataframe(tabla_df([{"Material": m, "Stock (mm)": r["stock"], "Compra": r["barras"], "Requerido (m)": round(r["requerido_m"], 2),
+                                        "Desperdicio (m)": round(r["desperdicio_m"], 2), "Desperdicio %": f"{r['desperdicio_pct']:.0%}", "Empalmes": r["empalmes"]}
+                                       for m, r in res["barras"].items()]), use_container_width=True, hide_index=True)
+            with st.expander("Plan de corte de rieles y barrales"):
+                for m, r in res["barras"].items():
+                    if m.startswith("Canto"): continue
+                    st.write(f"**{m}**")
+                    for cortes, k in r["patrones"]: st.text(f"{k} x barra: " + " + ".join(f"{c}x{l}mm" for l, c in cortes))
+    if t4:
+        with t4[0]:
+            cambios = diff_despiece(pz_anterior, pz)
+            if cambios: st.dataframe(tabla_df(cambios).style.format({"Largo": "{:.0f}", "Ancho": "{:.0f}"}), use_container_width=True)
+            else: st.success("Sin cambios en el despiece.")
+
 with contenedor_boton:
+    spec = {
+        **st.session_state["diseno"],
+        "espesor": espesor, "fondo_esp": fondo_esp, "zocalo": zocalo, "veta_frentes": veta_frentes,
+        "tipo_corredera": tipo_corredera, "tipo_bisagra": tipo_bisagra,
+        "precios": {"placa": precio_placa, "fondo": precio_fondo, "canto": precio_canto, "bisagra": c_bis,
+                    clave_guia: c_guia, "piston": c_piston, "kit": c_kit, "riel": c_riel, "barral": c_barral},
+        "margen": margen,
+    }
+    cliente = st.text_input("Cliente", key="cliente", placeholder="Nombre del cliente (para guardar la cotización)")
     if st.button("🚀 PROCESAR PROYECTO", type="primary", use_container_width=True):
-        pz = []; buy = []; err = []
-        
-        # --- HELPERS ---
-        def get_cantos(pieza):
-            if "Frente" in pieza or "Puerta" in pieza or "Hoja" in pieza: return "4L" 
-            if "Lat. Caj" in pieza or "Contra" in pieza: return "1L" 
-            if "Estante" in pieza or "Techo" in pieza or "Piso" in pieza or "Divisor" in pieza: return "1L" 
-            if "Lat. Externo" in pieza: return "1L" 
-            return "-"
-
-        def add_p(nombre, cant, largo, ancho, veta, mat, nota=""):
-            c = get_cantos(nombre)
-            pz.append({"Pieza": nombre, "Cant": cant, "Largo": largo, "Ancho": ancho, "Veta": veta, "Mat": mat, "Cantos": c, "Nota": nota})
-
-        # === LÓGICA DE PROFUNDIDAD (PLACARD) ===
-        # Si hay kit corredizo, el interior retrocede ~85mm.
-        prof_int = prof - 85 if tiene_placard else prof
-        
-        # Estructura
-        h_int = alto - zocalo - (espesor * 2); w_int = ancho - (espesor * 2)
-        
-        add_p("Lat. Externo", 2, alto, prof, "↕️", f"Mela {espesor}") # Laterales cubren todo
-        add_p("Techo/Piso", 2, w_int, prof, "↔️", f"Mela {espesor}")
-        add_p("Fondo", 1, alto-15, ancho-15, "-", f"Fibro {fondo_esp}")
-        
-        # Los divisores verticales usan la profundidad interna reducida
-        if cant_columnas > 1: add_p("Divisor Vert", cant_columnas-1, h_int, prof_int, "↕️", f"Mela {espesor}")
+        # Las columnas sin cambios salen de la caché del motor; se guarda el despiece anterior para el diff
+        if "resultado" in st.session_state: st.session_state["pz_anterior"] = st.session_state["resultado"][1]["pz"]
+        # Un diseño idéntico ya guardado se reusa sin recalcular
+        with corrida.fase("despiece", columnas=len(spec["columnas"])) as f:
+            res, h, reutilizado = get_almacen().cotizar(spec, cliente)
+            f.update(piezas=len(res["pz"]), reutilizado=reutilizado)
+        corrida.anotar(hash=h[:12])
+        if reutilizado: st.toast("Diseño ya cotizado: se reusó el resultado guardado.")
+        st.session_state["resultado"] = (spec, res)
+
+    # El resultado queda en session_state para que los widgets de las pestañas no lo borren
+    if "resultado" in st.session_state:
+        spec_proc, res = st.session_state["resultado"]
+        if spec_proc != spec: st.warning("El diseño cambió desde el último proceso: volvé a procesar para actualizar.")
+
+        corrida.anotar(piezas=len(res["pz"]))
+        if res["err"]:
+            for e in res["err"]: st.error(e)
+        else:
+            mostrar_resultado(res, "unico", pz_anterior=st.session_state.get("pz_anterior"))
 
-        w_hueco = (w_int - ((cant_columnas - 1) * espesor)) / cant_columnas
-        if w_hueco < 150: st.error(f"Hueco de {w_hueco:.0f}mm muy angosto."); st.stop()
+# ==============================================================================
+# 6. PROYECTO MULTI-MÓDULO
+# ==============================================================================
+# Un proyecto idéntico (mismos módulos y precios) se despieza una sola vez entre sesiones
+proyecto_cacheado = st.cache_data(max_entries=32, show_spinner=False)(despiece_proyecto)
 
-        # === DIBUJAR PLACARD SI EXISTE ===
-        if tiene_placard:
-            cruces = hojas_placard - 1
-            solape = 30 # mm
-            wa = (w_int + (cruces * solape)) / hojas_placard
-            add_p("Hoja Corrediza", hojas_placard, alto-zocalo-40, wa, veta_frentes, f"Mela {espesor}", "Kit Placard")
-            buy.append({"Item": "Kit Corredizo (Rieles)", "Cant": ancho/1000, "Unidad": "ml", "Costo": c_kit})
-
-        # === ITERAR COLUMNAS ===
-        for i, conf in enumerate(configuracion_columnas):
-            
-            if "Dividida" in conf["modo"]:
-                # Estante fijo usa prof_int
-                add_p(f"Estante Fijo (Div C{i+1})", 1, w_hueco, prof_int, "↔️", f"Mela {espesor}", "Estructural")
-
-            # --- CAJONES ---
-            def do_cajon(pos, cant, h_tot, is_sup):
-                h_disp = h_tot
-                if "Dividida" in conf["modo"] and not is_sup: h_disp -= espesor
-                
-                hf = (h_disp - ((cant-1)*3)) / cant
-                if hf < 70: err.append(f"C{i+1}: Cajón muy bajo."); return
-
-                add_p(f"Frente {pos}", cant, w_hueco-4, hf, veta_frentes, f"Mela {espesor}")
-                
-                # Caja de Cajón
-                espacio = hf - 30; hl = 0
-                for size in [180, 150, 100]:
-                    if espacio >= (size + 10): hl = size; break
-                if hl==0: err.append(f"C{i+1}: No entra lateral."); return
-                
-                # CÁLCULO DINÁMICO DE GUÍAS (Para no chocar con el placard)
-                largo_guia = int((prof_int - 15) // 50) * 50
-                if largo_guia > 550: largo_guia = 550
-                if largo_guia < 250: largo_guia = 250
-                
-                wc = w_hueco - (descuento_guia * 2) - 36
-                add_p("Lat. Cajón", cant*2, largo_guia, hl, "↔️", "Blanca 18")
-                add_p("Contra-Frente", cant, wc, hl, "↔️", "Blanca 18")
-                add_p("Fondo Cajón", cant, largo_guia, wc, "-", "Fibro 3")
-                buy.append({"Item": f"Guías {tipo_corredera} {largo_guia}mm", "Cant": cant, "Unidad": "par", "Costo": c_guia})
-
-            # --- PUERTAS ABATIBLES INTERNAS ---
-            def do_puerta(nom, h, data):
-                ap = data.get("apertura", "Lateral")
-                montaje = data.get("montaje", "Externa")
-                dob = data.get("doble")
-                din = data.get("interior")
-                
-                h_real = h - espesor if ("Dividida" in conf["modo"] and "Baja" in nom) else h
-                dw = 4 if "Externa" in montaje else 6
-                dh = 4 if "Externa" in montaje else 6
-
-                hojas = 2 if dob else 1
-                wa = (w_hueco - dw - (2 if dob else 0))/hojas if dob else (w_hueco - dw)
-                ha = h_real - dh
-
-                add_p(f"{nom} ({ap[:3]})", hojas, ha, wa, veta_frentes, f"Mela {espesor}", f"{montaje}")
-                
-                if "Lateral" in ap:
-                    bi = 2 if ha<900 else (3 if ha<1600 else (4 if ha<2100 else 5))
-                    b_tipo = "Codo 18" if "Interna" in montaje else tipo_bisagra 
-                    buy.append({"Item": f"Bisagras {b_tipo}", "Cant": bi*hojas, "Unidad": "u.", "Costo": c_bis})
-                elif "Rebatible" in ap:
-                    buy.append({"Item": f"Bisagras {tipo_bisagra}", "Cant": 2, "Unidad": "u.", "Costo": c_bis})
-                    buy.append({"Item": "Pistón a Gas", "Cant": 1, "Unidad": "u.", "Costo": c_piston})
-
-                if din:
-                    # El interior se descuenta respecto a prof_int
-                    pint = prof_int - 20 if "Externa" in montaje else prof_int - 40 
-                    if din["tipo"]=="Estantes":
-                        add_p("Estante Int.", din["cant"], w_hueco-2, pint, "↔️", f"Mela {espesor}")
-                    elif din["tipo"]=="Cubos":
-                        c=din["cols"]; r=din["rows"]
-                        if c>1: add_p("Div. Vert. Cubo", c-1, ha-2, pint, "↕️", f"Mela {espesor}")
-                        if r>1: add_p("Estante Cubo", r-1, w_hueco-2, pint, "↔️", f"Mela {espesor}")
-
-            # EJECUCIÓN POR TIPO
-            d_inf = conf["inf_data"]; d_sup = conf["sup_data"]
-            
-            if conf["inf_tipo"] == "Cajonera": do_cajon("Inf", d_inf["cant"], d_inf["alto"], False)
-            elif "Puerta" in conf["inf_tipo"]: do_puerta(conf["inf_tipo"], d_inf["alto"] if "Baja" in conf["inf_tipo"] else (alto-zocalo), d_inf)
-            
-            if "Dividida" in conf["modo"]:
-                h_inf = d_inf.get("alto", 0); h_rest = alto - zocalo - h_inf 
-                if conf["sup_tipo"] == "Cajonera": do_cajon("Sup", d_sup["cant"], h_rest, True)
-                elif conf["sup_tipo"] == "Puerta Alta": do_puerta("Puerta Alta", h_rest, d_sup)
-                elif conf["sup_tipo"] == "Estantes": add_p("Estante Móvil", d_sup["cant"], w_hueco-2, prof_int-20, "↔️", f"Mela {espesor}")
-                elif conf["sup_tipo"] == "Barral": buy.append({"Item": "Barral", "Cant": 1, "Unidad": "u.", "Costo": 3000})
-
-        if err:
-            for e in err: st.error(e)
+# Varios muebles comparten un único despiece: nesting y compra sobre todo el proyecto
+st.divider()
+with st.expander("🏗️ Proyecto multi-módulo", expanded=bool(st.session_state.get("modulos"))):
+    modulos = st.session_state.setdefault("modulos", [])
+    c1, c2 = st.columns([3, 1])
+    # El nombre identifica al módulo en el despiece: se propone el primero libre y no se aceptan repetidos
+    usados = {m["nombre"] for m in modulos}
+    nombre_mod = c1.text_input("Nombre del módulo", value=next(f"M{n}" for n in range(1, len(modulos) + 2) if f"M{n}" not in usados), label_visibility="collapsed")
+    if c2.button("➕ Agregar diseño actual", use_container_width=True):
+        if nombre_mod in usados: st.error(f"Ya hay un módulo \"{nombre_mod}\" en el proyecto.")
+        else: modulos.append({**{k: v for k, v in spec.items() if k not in ("precios", "margen")}, "nombre": nombre_mod})
+
+    if modulos:
+        # Por posición, no por nombre
+        quitar = st.multiselect("Quitar módulos", range(len(modulos)), format_func=lambda n: modulos[n]["nombre"])
+        if quitar and st.button("🗑️ Quitar seleccionados"):
+            st.session_state["modulos"] = modulos = [m for n, m in enumerate(modulos) if n not in quitar]
+            st.session_state.pop("resultado_proyecto", None)
+            st.rerun()
+
+        if st.toggle("🧊 Vista 3D del proyecto", key="proyecto_3d"):
+            c1, c2 = st.columns(2)
+            explotada_p = c1.toggle("Explotada", key="explotada_p")
+            baja_p = c2.toggle("Baja resolución", value=len(modulos) > MODULOS_BAJA_RES, key="baja_res_p")
+            st.plotly_chart(dibujar_3d(modulos, explotada_p, baja_p, f"Proyecto: {len(modulos)} módulos"), use_container_width=True)
+
+        if st.button("🧮 PROCESAR PROYECTO COMPLETO", type="primary", use_container_width=True):
+            st.session_state["resultado_proyecto"] = proyecto_cacheado({"nombre": "Proyecto", "modulos": modulos, "precios": spec["precios"], "margen": margen})
+
+        res_p = st.session_state.get("resultado_proyecto")
+        if res_p:
+            st.dataframe(tabla_df(res_p["modulos"]), use_container_width=True, hide_index=True)
+            if res_p["err"]:
+                for e in res_p["err"]: st.error(e)
+            else:
+                mostrar_resultado(res_p, "proyecto", "corte_proyecto.csv")
         else:
-            buy.insert(0, {"Item": "Tornillos 4x50", "Cant": len(pz)*4, "Unidad": "u.", "Costo": 10})
-            
-            t1,t2,t3=st.tabs(["Corte & Cantos","Herrajes","$$$"])
-            with t1: 
-                df = pd.DataFrame(pz)
-                st.dataframe(df.style.format({"Largo": "{:.0f}", "Ancho": "{:.0f}"}), use_container_width=True)
-                st.download_button("📥 Bajar CSV", df.to_csv(index=False).encode(), "corte_v22.csv")
-            with t2: st.dataframe(pd.DataFrame(buy).groupby(["Item","Unidad"], as_index=False).sum(), use_container_width=True)
-            with t3: 
-                cost = (math.ceil(sum([p["Largo"]*p["Ancho"]*p["Cant"] for p in pz if "Mela" in p["Mat"]])/1e6*1.3/4.75)*precio_placa) + sum([c["Costo"]*c["Cant"] for c in buy])
-                st.metric("Total", f"${cost*margen:,.0f}")
+            st.caption(f"{len(modulos)} módulos en el proyecto.")
+
+# ==============================================================================
+# 7. BARRIDO DE DISEÑOS
+# ==============================================================================
+barrer_cacheado = st.cache_data(max_entries=16, show_spinner=False)(barrer)
+
+with st.expander("🔎 Barrido de diseños (buscar el más barato)"):
+    d = st.session_state["diseno"]
+    st.caption(f"Evalúa todas las combinaciones de columnas, cajones, bloque superior, espesor y placard para el nicho de {d['ancho']}x{d['alto']}x{d['prof']}mm.")
+    if st.button("🔎 Barrer variantes", use_container_width=True):
+        base = {k: v for k, v in spec.items() if k not in ("columnas", "espesor", "tiene_placard", "hojas_placard")}
+        with st.spinner("Cotizando variantes..."):
+            st.session_state["barrido"] = barrer_cacheado(d["ancho"], d["alto"], d["prof"], base, procesos=1)
+    if "barrido" in st.session_state:
+        filas = st.session_state["barrido"]
+        validas = [f for f in filas if f["Total"] is not None]
+        st.write(f"{len(validas)} variantes válidas de {len(filas)}.")
+        if validas: st.dataframe(tabla_df(validas).drop(columns="Error"), use_container_width=True, hide_index=True)
+
+# ==============================================================================
+# 8. COTIZACIONES GUARDADAS
+# ==============================================================================
+with st.expander("📂 Cotizaciones guardadas"):
+    c1, c2, c3 = st.columns(3)
+    f_cliente = c1.text_input("Cliente", key="busca_cliente")
+    f_desde = c2.date_input("Desde", value=None, key="busca_desde")
+    f_hasta = c3.date_input("Hasta", value=None, key="busca_hasta")
+    filas = get_almacen().buscar(cliente=f_cliente or None, desde=f_desde, hasta=f_hasta + timedelta(days=1) if f_hasta else None)
+    if not filas: st.caption("Sin cotizaciones para esos filtros.")
+    else:
+        sel = st.dataframe(tabla_df(filas).drop(columns="hash"), use_container_width=True, hide_index=True, on_select="rerun", selection_mode="single-row", key="tabla_cotizaciones")
+        if sel.selection.rows:
+            h = filas[sel.selection.rows[0]]["hash"]
+            c1, c2 = st.columns(2)
+            if c1.button("📂 Abrir", use_container_width=True):
+                st.session_state["cotizacion_abierta"] = get_almacen().obtener(h)[1]
+            if c2.button("💲 Recotizar con precios actuales", use_container_width=True):
+                st.session_state["cotizacion_abierta"] = get_almacen().recotizar(h, spec["precios"], margen)[0]
+    abierta = st.session_state.get("cotizacion_abierta")
+    if abierta:
+        if abierta["err"]:
+            for e in abierta["err"]: st.error(e)
+        else: mostrar_resultado(abierta, "guardada", "corte_guardado.csv")
+
+# ==============================================================================
+# 9. PANEL DE RENDIMIENTO
+# ==============================================================================
+historial_perf.append(corrida.cerrar().a_dict())
+if debug_perf:
+    with st.sidebar:
+        st.markdown("### 🐞 Rendimiento")
+        ult = historial_perf[-1]
+        st.caption(f"Última corrida: {ult['total_ms']:.0f} ms · " + " · ".join(f"{k}={v}" for k, v in ult["datos"].items()))
+        st.dataframe(tabla_df(ult["fases"]), use_container_width=True, hide_index=True)
+        st.caption("Historial (incluye reruns del panel de diseño)")
+        st.dataframe(tabla_df([{"inicio": c["inicio"], "tipo": c["tipo"], "total_ms": c["total_ms"], **c["datos"]} for c in historial_perf]), use_container_width=True, hide_index=True)
+        st.download_button("📥 Exportar JSON", a_json(historial_perf).encode(), "perfil.jsonl", "application/json", key="perf_json")
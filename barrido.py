@@ -0,0 +1,69 @@
+"""Barrido paramétrico: evalúa muchas variantes de un nicho y las ordena por costo.
+
+Dado un nicho (ancho x alto x profundidad) genera todas las combinaciones de
+cantidad de columnas, columnas con cajonera, cantidad de cajones, tipo de
+bloque superior, espesor y kit placard, las cotiza en lote con el motor y
+devuelve una tabla ordenada de costo contra capacidad de guardado.
+"""
+from itertools import product
+
+from despiece import SPEC_DEFAULT, cotizar_lote
+from restricciones import max_cajones, tabla_factibilidad
+
+ALTO_INFERIOR = 720  # mm, alto del bloque inferior de las columnas divididas
+
+
+def generar_variantes(ancho, alto, prof, base=None, columnas=range(1, 6), espesores=(15, 18),
+                      placard=(False, True), superiores=("Barral", "Estantes"), alto_inf=ALTO_INFERIOR):
+    """Devuelve `[(variante, spec)]` con todas las combinaciones del espacio de diseño.
+
+    `base` aporta el resto de los parámetros de la spec (zócalo, herrajes,
+    precios...). Cada variante usa columnas Divididas: las `cajoneras`
+    primeras con `cajones` cajones abajo y todas con el mismo bloque superior.
+    Las combinaciones que las tablas de factibilidad descartan no se generan.
+    """
+    base = dict(base or {})
+    base.update({"ancho": ancho, "alto": alto, "prof": prof})
+    zocalo = base.get("zocalo", SPEC_DEFAULT["zocalo"])
+    out = []
+    for n, esp, plac, sup in product(columnas, espesores, placard, superiores):
+        # Sólo combinaciones factibles: ancho de hueco y cajones que entran
+        f = tabla_factibilidad(ancho, alto, prof, zocalo, esp, plac)
+        if n > f.max_columnas: continue
+        max_caj = max_cajones(f, alto_inf - esp)
+        for k in range(n + 1 if max_caj else 1):
+            for d in (range(1, max_caj + 1) if k else (0,)):
+                caj = {"inf_tipo": "Cajonera", "inf_data": {"alto": alto_inf, "cant": d}, "sup_tipo": sup, "sup_data": {"cant": 3}, "modo": "Dividida"}
+                lib = {"inf_tipo": "Vacío", "inf_data": {"alto": alto_inf}, "sup_tipo": sup, "sup_data": {"cant": 3}, "modo": "Dividida"}
+                var = {"Columnas": n, "Cajoneras": k, "Cajones x col": d, "Superior": sup, "Espesor": esp, "Placard": plac}
+                spec = {**base, "espesor": esp, "tiene_placard": plac, "hojas_placard": 2 if plac else 0,
+                        "columnas": [caj] * k + [lib] * (n - k)}
+                out.append((var, spec))
+    return out
+
+
+def metricas_guardado(spec, res):
+    """Capacidad de guardado de un resultado: cajones, m² de estantes y metros de barral."""
+    cajones = sum(p["Cant"] for p in res["pz"] if p["Pieza"].startswith("Frente"))
+    estantes = sum(p["Largo"] * p["Ancho"] * p["Cant"] for p in res["pz"] if "Estante" in p["Pieza"] and "Fijo" not in p["Pieza"]) / 1e6
+    barral = sum(l["Largo"] * l["Cant"] for l in res["lineal"] if l["Material"] == "Barral") / 1000
+    return {"Cajones": cajones, "Estantes m²": round(estantes, 2), "Barral m": round(barral, 2)}
+
+
+def barrer(ancho, alto, prof, base=None, procesos=None, **kw):
+    """Cotiza todas las variantes en paralelo y las devuelve ordenadas por total.
+
+    Las variantes inviables (errores del motor) quedan al final con su error.
+    """
+    variantes = generar_variantes(ancho, alto, prof, base, **kw)
+    # Sin nesting completo: para rankear alcanza el modo acotado
+    specs = [{**s, "limite_nesting": 0.05} for _, s in variantes]
+    filas = []
+    for (var, spec), res in zip(variantes, cotizar_lote(specs, procesos=procesos)):
+        if res["err"]:
+            filas.append({**var, "Total": None, "Error": res["err"][0]})
+            continue
+        m = metricas_guardado(spec, res)
+        filas.append({**var, "Total": round(res["total"]), "Placas": res["costos"]["placas"], **m, "Error": ""})
+    filas.sort(key=lambda f: (f["Total"] is None, f["Total"] or 0))
+    return filas
@@ -0,0 +1,194 @@
+"""Benchmark de los caminos calientes sobre placards sintéticos.
+
+Genera specs aleatorias que cubren el espacio soportado (1 a 5 columnas,
+Dividida/Entera, Cajonera/Puerta/Cubos/Estantes/Barral, placard de 2 a 4
+hojas) y mide, sin Streamlit, el despiece, el costeo (tabla columnar y
+costo), el nesting, el corte lineal, el armado de la figura
+(`dibujo.dibujar_mueble`), la vista 3D y la exportación CSV, desde un
+placard suelto hasta proyectos de miles de módulos. Los resultados se
+guardan en JSON para comparar versiones.
+
+Uso: python -m benchmarks.bench_app [--escalas 1 10 100 1000] [--rep 3] [--seed 0]
+     [--salida benchmarks/resultados/<commit>.json] [--comparar otra.json]
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+import dibujo
+import vista3d
+from benchmarks.bench_nesting import columna_aleatoria
+from despiece import SPEC_DEFAULT, _despiece_columna, _nesting, armar_despiece, completar_spec
+from exportar import escribir_despiece
+from lineal import optimizar_lineal, requerimientos_canto
+from nesting import optimizar_placas
+from proyecto import LIMITE_NESTING_PROYECTO, agrupar_herrajes
+from tabla import TablaCorte, costear
+
+CARPETA = os.path.join(os.path.dirname(__file__), "resultados")
+FASES = ("despiece", "despiece_tibio", "costeo", "nesting", "lineal", "figura", "figura_tibia", "vista_3d", "csv")
+
+
+# ==============================================================================
+# 1. SPECS SINTÉTICAS
+# ==============================================================================
+def puerta_aleatoria(rnd):
+    ap = rnd.choice(["Lateral (Bisagra)", "Rebatible Arriba (Pistón)", "Rebatible Abajo (Pistón)"])
+    interior = rnd.choice([{}, {"tipo": "Estantes", "cant": rnd.randint(1, 5)},
+                           {"tipo": "Cubos", "cols": rnd.randint(1, 4), "rows": rnd.randint(1, 5)}])
+    return {"apertura": ap, "montaje": rnd.choice(["Externa (Sobrepuesta)", "Interna (Dentro)"]),
+            "doble": "Lateral" in ap and rnd.random() < 0.5, "interior": interior}
+
+
+def columna_sintetica(rnd, alto_util):
+    """Como `columna_aleatoria`, más cajoneras y puertas enteras e interiores con cubos."""
+    r = rnd.random()
+    if r < 0.15:
+        return {"inf_tipo": "Cajonera", "inf_data": {"alto": alto_util, "cant": rnd.randint(4, 8)}, "sup_tipo": "Vacío", "sup_data": {}, "modo": "Entera"}
+    if r < 0.3:
+        return {"inf_tipo": "Puerta Entera", "inf_data": {**puerta_aleatoria(rnd), "alto": alto_util}, "sup_tipo": "Vacío", "sup_data": {}, "modo": "Entera"}
+    conf = columna_aleatoria(rnd)
+    for lado in ("inf", "sup"):
+        if "Puerta" in conf[f"{lado}_tipo"]: conf[f"{lado}_data"] = {**conf[f"{lado}_data"], **puerta_aleatoria(rnd)}
+    return conf
+
+
+def spec_sintetica(rnd):
+    alto, zocalo = rnd.randrange(1800, 2500, 10), rnd.choice([70, 100])
+    placard = rnd.random() < 0.4
+    return {
+        "ancho": rnd.randrange(900, 3000, 10), "alto": alto, "prof": rnd.randrange(450, 650, 10),
+        "espesor": rnd.choice([15, 18]), "zocalo": zocalo,
+        "veta_frentes": rnd.choice(["↔️ Horizontal", "↕️ Vertical"]),
+        "tipo_corredera": rnd.choice(["Telescópicas", "Comunes (Z)", "Push / Tip-On"]),
+        "tiene_placard": placard, "hojas_placard": rnd.randint(2, 4) if placard else 0,
+        "columnas": [columna_sintetica(rnd, alto - zocalo) for _ in range(rnd.randint(1, 5))],
+    }
+
+
+def specs_validas(rnd, n):
+    """`n` specs sintéticas que el motor acepta (se descartan las que dan error)."""
+    out = []
+    while len(out) < n:
+        s = spec_sintetica(rnd)
+        if not armar_despiece(s)["err"]: out.append(s)
+    return out
+
+
+# ==============================================================================
+# 2. MEDICIÓN
+# ==============================================================================
+def cronometrar(f, rep):
+    """Ejecuta `f` `rep` veces; devuelve (último resultado, [segundos])."""
+    tiempos = []
+    for _ in range(rep):
+        t0 = time.perf_counter(); r = f(); tiempos.append(time.perf_counter() - t0)
+    return r, tiempos
+
+
+def figura(s):
+    s = completar_spec(s)
+    return dibujo.dibujar_mueble(s["ancho"], s["alto"], s["zocalo"], len(s["columnas"]), s["columnas"], s["espesor"],
+                                 "Push" in s["tipo_corredera"], s["tiene_placard"], s["hojas_placard"])
+
+
+def medir_escala(specs, rep):
+    """Tiempos por fase para un proyecto con un módulo por spec."""
+    limite = LIMITE_NESTING_PROYECTO if len(specs) > 1 else None
+
+    def despiece():
+        pz, buy, lineal = [], [], []
+        for s in specs:
+            r = armar_despiece(s); pz += r["pz"]; buy += r["buy"]; lineal += r["lineal"]
+        return pz, agrupar_herrajes(buy), lineal
+
+    def frio(f):
+        def g():
+            _despiece_columna.cache_clear(); dibujo._dibujar_columna.cache_clear(); _nesting.cache_clear()
+            return f()
+        return g
+
+    (pz, buy, lineal), t_desp = cronometrar(frio(despiece), rep)
+    _, t_desp_tibio = cronometrar(despiece, rep)
+    nest, t_nest = cronometrar(lambda: optimizar_placas(pz, limite_s=limite), rep)
+    placas = sum(r["placas"] for r in nest.values())
+
+    def costeo():
+        tabla = TablaCorte.desde_pz(pz)
+        return tabla, costear(tabla, buy, placas, SPEC_DEFAULT["precios"])
+
+    (tabla, _), t_costeo = cronometrar(costeo, rep)
+    _, t_lineal = cronometrar(lambda: optimizar_lineal(lineal + requerimientos_canto(tabla)), rep)
+    _, t_fig = cronometrar(frio(lambda: [figura(s) for s in specs]), rep)
+    _, t_fig_tibia = cronometrar(lambda: [figura(s) for s in specs], rep)
+    _, t_3d = cronometrar(lambda: vista3d.figura_3d(specs, baja=len(specs) > 10), rep)
+    _, t_csv = cronometrar(lambda: escribir_despiece(io.StringIO(), pz), rep)
+
+    tiempos = dict(zip(FASES, (t_desp, t_desp_tibio, t_costeo, t_nest, t_lineal, t_fig, t_fig_tibia, t_3d, t_csv)))
+    return {
+        "modulos": len(specs), "columnas": sum(len(s["columnas"]) for s in specs),
+        "filas": len(pz), "piezas": sum(p["Cant"] for p in pz), "placas": placas,
+        "fases": {f: {"min_ms": round(min(t) * 1000, 3), "mediana_ms": round(statistics.median(t) * 1000, 3)} for f, t in tiempos.items()},
+    }
+
+
+def version():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "local"
+
+
+# ==============================================================================
+# 3. REPORTE
+# ==============================================================================
+def imprimir(resultado, base=None):
+    previas = {e["modulos"]: e for e in base["escalas"]} if base else {}
+    for e in resultado["escalas"]:
+        print(f"\n{e['modulos']} módulos · {e['columnas']} columnas · {e['filas']} filas · {e['piezas']} piezas · {e['placas']} placas")
+        for f, t in e["fases"].items():
+            linea = f"  {f:<15}{t['min_ms']:>11.2f} ms"
+            ant = previas.get(e["modulos"], {}).get("fases", {}).get(f)
+            if ant and ant["min_ms"]: linea += f"   x{t['min_ms'] / ant['min_ms']:.2f} vs {base['version']}"
+            print(linea)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--escalas", type=int, nargs="+", default=[1, 10, 100, 1000], help="módulos por proyecto")
+    ap.add_argument("--rep", type=int, default=3, help="repeticiones por fase (se reporta mínimo y mediana)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--salida", help="JSON de resultados (por defecto benchmarks/resultados/<commit>.json)")
+    ap.add_argument("--comparar", help="JSON de una corrida anterior para comparar")
+    args = ap.parse_args()
+
+    rnd = random.Random(args.seed)
+    todas = specs_validas(rnd, max(args.escalas))
+    resultado = {
+        "version": version(), "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(), "plataforma": platform.platform(),
+        "seed": args.seed, "rep": args.rep,
+        "escalas": [medir_escala(todas[:n], args.rep) for n in args.escalas],
+    }
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f: base = json.load(f)
+    imprimir(resultado, base)
+
+    salida = args.salida or os.path.join(CARPETA, f"{resultado['version']}.json")
+    os.makedirs(os.path.dirname(salida) or ".", exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f: json.dump(resultado, f, ensure_ascii=False, indent=1)
+    print(f"\nResultados en {salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Compara el nesting guillotina contra la estimación por área.
+
+Uso: python -m benchmarks.bench_nesting [--n 200] [--seed 0]
+"""
+import argparse
+import random
+import time
+
+from despiece import calcular_despiece
+from nesting import optimizar_placas, placas_heuristica
+
+
+def columna_aleatoria(rnd):
+    modo = rnd.choice(["Dividida", "Entera"])
+    if modo == "Entera":
+        tipo = rnd.choice(["Vacío", "Estantes", "Barral"])
+        return {"inf_tipo": "Vacío", "inf_data": {}, "sup_tipo": tipo, "sup_data": {"cant": rnd.randint(2, 6)}, "modo": modo}
+    puerta = {"apertura": "Lateral (Bisagra)", "montaje": "Externa (Sobrepuesta)", "doble": rnd.random() < 0.5, "interior": {}}
+    inf = rnd.choice(["Vacío", "Cajonera", "Puerta Baja"])
+    inf_data = {"alto": rnd.choice([600, 720, 900])}
+    if inf == "Cajonera": inf_data["cant"] = rnd.randint(1, 3)
+    if inf == "Puerta Baja": inf_data.update(puerta)
+    sup = rnd.choice(["Vacío", "Estantes", "Barral", "Puerta Alta"])
+    sup_data = dict(puerta) if sup == "Puerta Alta" else {"cant": rnd.randint(1, 4)}
+    return {"inf_tipo": inf, "inf_data": inf_data, "sup_tipo": sup, "sup_data": sup_data, "modo": modo}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--n", type=int, default=200, help="cantidad de placards sintéticos")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rnd = random.Random(args.seed)
+    pz_total, dif, t_max = [], [], 0.0
+    for _ in range(args.n):
+        cols = rnd.randint(1, 5)
+        spec = {"ancho": rnd.randrange(900, 3000, 10), "alto": rnd.randrange(1800, 2500, 10),
+                "columnas": [columna_aleatoria(rnd) for _ in range(cols)]}
+        res = calcular_despiece(spec)
+        if res["err"]: continue
+        t0 = time.perf_counter()
+        n = sum(r["placas"] for r in optimizar_placas(res["pz"]).values())
+        t_max = max(t_max, time.perf_counter() - t0)
+        dif.append(n - placas_heuristica(res["pz"]))
+        pz_total += res["pz"]
+
+    print(f"Placards válidos: {len(dif)}")
+    print(f"Nesting - heurística (placas): min {min(dif)}, max {max(dif)}, media {sum(dif)/len(dif):+.2f}")
+    print(f"Peor tiempo por placard: {t_max*1000:.1f} ms")
+
+    piezas = sum(p["Cant"] for p in pz_total if "Mela" in p["Mat"])
+    for limite in (None, 1.0):
+        t0 = time.perf_counter()
+        n = sum(r["placas"] for r in optimizar_placas(pz_total, limite_s=limite).values())
+        print(f"Lote completo ({piezas} piezas, limite_s={limite}): {n} placas en {time.perf_counter()-t0:.2f}s; heurística {placas_heuristica(pz_total)}")
+
+
+if __name__ == "__main__":
+    main()
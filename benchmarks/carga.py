@@ -0,0 +1,221 @@
+"""Prueba de carga multi-sesión de la app con el API de testing de Streamlit.
+
+Simula un salón de ventas: cada sesión es un `AppTest` propio (su
+session_state) dentro del mismo proceso, así que comparte con las demás las
+cachés de Streamlit, las lru_cache del motor y el almacén, como en el
+servidor. Cada sesión recorre un guion sobre los widgets reales (medidas,
+columnas, PROCESAR, vista 3D, formato de corte, proyecto) con un diseño
+tomado de un grupo chico de nichos, para que haya diseños repetidos entre
+sesiones. Se reportan percentiles de latencia por acción y la memoria por
+sesión (session_state serializado y crecimiento del RSS del proceso). Una
+primera sesión corre sola para el arranque en frío (imports perezosos, cachés
+vacías) y se reporta aparte; el resto se intercala acción por acción.
+
+Uso: python -m benchmarks.carga [--sesiones 20] [--concurrencia 4] [--disenos 5]
+     [--seed 0] [--db cotizaciones.db] [--salida benchmarks/resultados/carga-<commit>.json]
+"""
+import argparse
+import json
+import os
+import pickle
+import platform
+import random
+import resource
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.bench_app import CARPETA, version
+from restricciones import tabla_factibilidad
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+ACCIONES = ("abrir", "medidas", "columnas", "cajonera", "procesar", "vista_3d", "formato", "agregar_modulo", "procesar_proyecto")
+
+
+# ==============================================================================
+# 1. DISEÑOS Y GUION
+# ==============================================================================
+def disenos_aleatorios(rnd, n):
+    """`n` nichos `(ancho, alto, prof, columnas)` con la cantidad de columnas que el casco admite."""
+    out = []
+    for _ in range(n):
+        ancho, alto, prof = rnd.randrange(1200, 2400, 10), rnd.randrange(1800, 2400, 10), rnd.randrange(500, 650, 10)
+        max_cols = min(5, max(1, tabla_factibilidad(ancho, alto, prof, 70, 18, False).max_columnas))
+        out.append((ancho, alto, prof, rnd.randint(1, min(4, max_cols))))
+    return out
+
+
+def _por_etiqueta(widgets, etiqueta):
+    return next(w for w in widgets if w.label == etiqueta)
+
+
+def _boton(at, texto):
+    return next(b for b in at.button if texto in b.label)
+
+
+def guion(at, diseno):
+    """Acciones de una sesión: `(nombre, función que deja los widgets listos para el rerun)`."""
+    ancho, alto, prof, cols = diseno
+
+    def medidas():
+        for etiqueta, v in (("Ancho Total (mm)", ancho), ("Alto Total (mm)", alto), ("Profundidad Externa (mm)", prof)):
+            _por_etiqueta(at.number_input, etiqueta).set_value(v)
+
+    return [
+        ("abrir", lambda: None),
+        ("medidas", medidas),
+        ("columnas", lambda: _por_etiqueta(at.number_input, "Cantidad de Columnas Internas").set_value(cols)),
+        ("cajonera", lambda: at.selectbox(key="inf_0").set_value("Cajonera")),
+        ("procesar", lambda: _boton(at, "PROCESAR PROYECTO").click()),
+        ("vista_3d", lambda: at.radio(key="vista").set_value("3D")),
+        ("formato", lambda: at.selectbox(key="fmt_unico").set_value("optimizador")),
+        ("agregar_modulo", lambda: _boton(at, "Agregar diseño actual").click()),
+        ("procesar_proyecto", lambda: _boton(at, "PROCESAR PROYECTO COMPLETO").click()),
+    ]
+
+
+# ==============================================================================
+# 2. SESIONES
+# ==============================================================================
+def tamano_estado(at):
+    """Bytes del session_state serializado (lo que no se puede picklear no se cuenta)."""
+    total = 0
+    for k in at.session_state:
+        try: total += len(pickle.dumps(at.session_state[k]))
+        except Exception: pass
+    return total
+
+
+def sesion(n, diseno, timeout, out):
+    """Generador que corre una acción del guion por paso; al terminar deja en `out` latencias, errores y memoria."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    latencias, errores = {}, []
+    out.update(sesion=n, diseno=list(diseno), latencias=latencias, errores=errores, at=at)
+    for accion, preparar in guion(at, diseno):
+        try:
+            preparar()
+            t0 = time.perf_counter(); at.run(); latencias[accion] = time.perf_counter() - t0
+        except Exception as e:   # un widget que no aparece corta el guion de esta sesión
+            errores.append(f"{accion}: {type(e).__name__}: {e}"); break
+        if at.exception: errores.append(f"{accion}: {at.exception[0].message}"); break
+        yield accion
+    perf = list(at.session_state["historial_perf"]) if "historial_perf" in at.session_state else []
+    out["reutilizados"] = sum(1 for c in perf if c["tipo"] == "app" and any(f.get("reutilizado") for f in c["fases"]))
+    out["estado_kb"] = round(tamano_estado(at) / 1024, 1)
+
+
+def intercalar(elegidos, abiertas, timeout):
+    """Corre las sesiones de a `abiertas` a la vez, alternando una acción de cada una.
+
+    Todo en un hilo: `AppTest` no es seguro entre hilos, y con el GIL los
+    reruns de un servidor real también se reparten el intérprete.
+    """
+    pendientes = iter(enumerate(elegidos))
+    activas, resultados = [], []
+
+    def abrir():
+        for n, d in pendientes:
+            resultados.append({}); activas.append(sesion(n, d, timeout, resultados[-1])); return
+
+    for _ in range(abiertas): abrir()
+    while activas:
+        for g in list(activas):
+            if next(g, None) is None: activas.remove(g); abrir()
+    return resultados
+
+
+# ==============================================================================
+# 3. REPORTE
+# ==============================================================================
+def percentil(xs, p):
+    """Percentil `p` (0-100) por rango más cercano."""
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, max(0, round(p / 100 * len(xs) + 0.5) - 1))]
+
+
+def resumir(tiempos):
+    ms = [t * 1000 for t in tiempos]
+    return {"n": len(ms), **{f"p{p}_ms": round(percentil(ms, p), 1) for p in (50, 90, 99)}, "max_ms": round(max(ms), 1)}
+
+
+def rss_mb():
+    # ru_maxrss está en KB en Linux (en bytes en macOS)
+    r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return r / 1024 / (1024 if platform.system() == "Darwin" else 1)
+
+
+def imprimir(resultado):
+    print(f"\nArranque en frío: {resultado['arranque']['total_s']:.1f} s ("
+          + ", ".join(f"{a} {t:.0f}" for a, t in resultado["arranque"]["latencias_ms"].items()) + " ms)")
+    print(f"{resultado['sesiones']} sesiones · concurrencia {resultado['concurrencia']} · {resultado['disenos']} diseños · "
+          f"{resultado['duracion_s']:.1f} s · {resultado['reruns_por_s']:.1f} reruns/s")
+    print(f"  {'acción':<19}{'n':>5}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}  (ms)")
+    for a, r in {**resultado["acciones"], "total": resultado["total"]}.items():
+        print(f"  {a:<19}{r['n']:>5}{r['p50_ms']:>10.1f}{r['p90_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['max_ms']:>10.1f}")
+    m = resultado["memoria"]
+    print(f"  memoria: {m['estado_kb_medio']:.0f} KB de session_state por sesión · RSS {m['rss_inicial_mb']:.0f} -> {m['rss_final_mb']:.0f} MB "
+          f"({m['rss_por_sesion_mb']:.2f} MB por sesión)")
+    print(f"  diseños reusados del almacén: {resultado['reutilizados']} · sesiones con error: {len(resultado['errores'])}")
+    for e in resultado["errores"][:5]: print(f"    {e}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sesiones", type=int, default=20)
+    ap.add_argument("--concurrencia", type=int, default=4, help="sesiones abiertas a la vez (intercaladas)")
+    ap.add_argument("--disenos", type=int, default=5, help="nichos distintos entre los que eligen las sesiones")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--timeout", type=float, default=120, help="segundos máximos por rerun")
+    ap.add_argument("--db", help="almacén SQLite a usar (por defecto uno temporal y vacío)")
+    ap.add_argument("--salida", help="JSON de resultados (por defecto benchmarks/resultados/carga-<commit>.json)")
+    args = ap.parse_args()
+
+    # El almacén lee la ruta al importarse: tiene que estar antes de la primera corrida
+    tmp = None
+    if not args.db:
+        tmp = tempfile.TemporaryDirectory(); args.db = os.path.join(tmp.name, "carga.db")
+    os.environ["CARPINTERIA_DB"] = args.db
+
+    rnd = random.Random(args.seed)
+    pool = disenos_aleatorios(rnd, args.disenos)
+    elegidos = [rnd.choice(pool) for _ in range(args.sesiones)]
+
+    t0 = time.perf_counter()
+    arranque, = intercalar(elegidos[:1], 1, args.timeout)
+    arranque_s = time.perf_counter() - t0
+
+    # Las AppTest quedan vivas en los resultados hasta el final para medir la memoria de todas juntas
+    rss0, t0 = rss_mb(), time.perf_counter()
+    sesiones = intercalar(elegidos, args.concurrencia, args.timeout)
+    duracion, rss1 = time.perf_counter() - t0, rss_mb()
+
+    por_accion = {a: [s["latencias"][a] for s in sesiones if a in s["latencias"]] for a in ACCIONES}
+    todas = [t for ts in por_accion.values() for t in ts]
+    resultado = {
+        "version": version(), "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(), "plataforma": platform.platform(),
+        "seed": args.seed, "sesiones": args.sesiones, "concurrencia": args.concurrencia, "disenos": args.disenos,
+        "arranque": {"total_s": round(arranque_s, 2), "latencias_ms": {a: round(t * 1000, 1) for a, t in arranque["latencias"].items()}},
+        "duracion_s": round(duracion, 2), "reruns_por_s": len(todas) / duracion,
+        "acciones": {a: resumir(ts) for a, ts in por_accion.items() if ts},
+        "total": resumir(todas),
+        "memoria": {"estado_kb_medio": sum(s["estado_kb"] for s in sesiones) / len(sesiones),
+                    "rss_inicial_mb": round(rss0, 1), "rss_final_mb": round(rss1, 1),
+                    "rss_por_sesion_mb": round((rss1 - rss0) / len(sesiones), 3)},
+        "reutilizados": sum(s["reutilizados"] for s in sesiones),
+        "errores": [f"sesión {s['sesion']}: {e}" for s in (arranque, *sesiones) for e in s["errores"]],
+        "detalle": [{k: v for k, v in s.items() if k != "at"} for s in sesiones],
+    }
+    imprimir(resultado)
+
+    salida = args.salida or os.path.join(CARPETA, f"carga-{resultado['version']}.json")
+    os.makedirs(os.path.dirname(salida) or ".", exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f: json.dump(resultado, f, ensure_ascii=False, indent=1)
+    print(f"\nResultados en {salida}")
+    if tmp: tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
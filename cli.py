@@ -0,0 +1,92 @@
+"""Cotización headless por línea de comandos, sin Streamlit, pandas ni Plotly.
+
+Pensado para workers que arrancan por pedido: sólo importa el motor.
+
+Uso: python cli.py spec.json [--csv corte.csv] [--formato optimizador] [--json resultado.json]
+     python cli.py lote.json [--procesos 4]     (lista de specs: un resumen JSON por línea)
+     python cli.py pedidos.jsonl --exportar corte.parquet [--formato parquet]
+     cat spec.json | python cli.py -
+
+El JSON puede ser una spec del motor, un proyecto (`{"modulos": [...]}`) o una
+lista de specs; un `.jsonl` trae un trabajo por línea y con `--exportar` se
+lee y exporta de a uno (ver exportar.py). Sale con código 1 si alguna spec
+tiene errores de diseño.
+"""
+import argparse
+import json
+import sys
+
+from despiece import calcular_despiece, cotizar_lote
+from exportar import FORMATOS, escribir_despiece, exportar
+from proyecto import despiece_proyecto
+
+# Lo que se vuelca con --json (la tabla columnar se rearma desde `pz`)
+_CLAVES_RESULTADO = ("pz", "buy", "lineal", "err", "nesting", "barras", "costos", "costo", "total", "modulos")
+
+
+def resumen(res):
+    """Totales de un resultado: piezas, placas, costo, total y errores."""
+    return {
+        "piezas": sum(p["Cant"] for p in res["pz"]),
+        "placas": res["costos"]["placas"] if res["costos"] else None,
+        "costo": res["costo"], "total": res["total"], "errores": res["err"],
+    }
+
+
+def cotizar_trabajos(trabajos, procesos=None):
+    """Como `cotizar_lote`, aceptando también proyectos (que se cotizan en serie)."""
+    res_specs = iter(cotizar_lote([t for t in trabajos if "modulos" not in t], procesos=procesos))
+    return [despiece_proyecto(t) if "modulos" in t else next(res_specs) for t in trabajos]
+
+
+def leer_jsonl(f):
+    """Un trabajo por línea, leído a demanda."""
+    for linea in f:
+        if linea.strip(): yield json.loads(linea)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("entrada", help="archivo JSON o - para leer de stdin")
+    ap.add_argument("--csv", help="escribe el despiece en este archivo (- para stdout)")
+    ap.add_argument("--json", help="escribe el resultado completo en este archivo")
+    ap.add_argument("--procesos", type=int, help="procesos para un lote de specs (1 = en serie)")
+    ap.add_argument("--limite-nesting", type=float, help="segundos máximos de nesting (modo acotado)")
+    ap.add_argument("--exportar", help="sólo exporta el despiece de todos los trabajos a este archivo")
+    ap.add_argument("--formato", default="csv", choices=["parquet", *FORMATOS], help="formato de --exportar y --csv (--csv no admite parquet)")
+    args = ap.parse_args(argv)
+    if args.csv and args.formato == "parquet": ap.error("--csv escribe texto: para parquet usar --exportar")
+
+    f = sys.stdin if args.entrada == "-" else open(args.entrada, encoding="utf-8")
+    with f:
+        if args.entrada.endswith(".jsonl"): datos = leer_jsonl(f)
+        else: datos = json.load(f)
+        # Exportación en lote: los trabajos se consumen de a uno, sin cotizar
+        if args.exportar:
+            trabajos = [datos] if isinstance(datos, dict) else datos
+            res = exportar(trabajos, args.exportar, args.formato)
+            print(json.dumps(res, ensure_ascii=False))
+            return 1 if res["errores"] else 0
+        if not isinstance(datos, (dict, list)): datos = list(datos)
+    extra = {"limite_nesting": args.limite_nesting} if args.limite_nesting is not None else {}
+
+    # Lote: un resumen por línea, en el orden de entrada
+    if isinstance(datos, list):
+        resultados = cotizar_trabajos([{**s, **extra} for s in datos], procesos=args.procesos)
+        for r in resultados: print(json.dumps(resumen(r), ensure_ascii=False))
+        return 1 if any(r["err"] for r in resultados) else 0
+
+    res = despiece_proyecto({**datos, **extra}) if "modulos" in datos else calcular_despiece({**datos, **extra})
+    # Con el CSV por stdout, el resumen va a stderr
+    print(json.dumps(resumen(res), ensure_ascii=False), file=sys.stderr if args.csv == "-" else sys.stdout)
+    if args.csv == "-": escribir_despiece(sys.stdout, res["pz"], args.formato, datos.get("nombre", ""))
+    elif args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f: escribir_despiece(f, res["pz"], args.formato, datos.get("nombre", ""))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({k: res.get(k) for k in _CLAVES_RESULTADO}, f, ensure_ascii=False)
+    return 1 if res["err"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+"""Motor de despiece headless de CarpinterIA.
+
+Toma la especificación de un placard (los parámetros de la barra lateral más
+`configuracion_columnas`) y devuelve piezas, herrajes y costo sin depender de
+Streamlit, para poder cotizar en lote.
+"""
+import json
+import math
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from lineal import DESCUENTO_BARRAL, compras_lineales, optimizar_lineal, requerimientos_canto
+from nesting import optimizar_placas
+from restricciones import FONDO_PLACARD, FRENTE_MIN, HUECO_MIN, largo_guia, lateral_cajon
+from tabla import TablaCorte, costear
+
+# ==============================================================================
+# 1. PARÁMETROS
+# ==============================================================================
+# Subir cuando cambie el despiece o el costeo: invalida los resultados guardados
+VERSION_MOTOR = 3
+
+PRECIOS_DEFAULT = {
+    "placa": 85000, "fondo": 25000, "canto": 800,
+    "bisagra": 2500, "guia": 6500, "guia_comun": 2500, "piston": 4500, "kit": 11000, "riel": 6000, "barral": 3000,
+}
+
+SPEC_DEFAULT = {
+    "ancho": 1600, "alto": 2000, "prof": 600,
+    "espesor": 18, "fondo_esp": 3, "zocalo": 70, "veta_frentes": "↔️ Horizontal",
+    "tipo_corredera": "Telescópicas", "tipo_bisagra": "Codo 0 (Ext)",
+    "tiene_placard": False, "hojas_placard": 0,
+    "precios": PRECIOS_DEFAULT, "margen": 2.5,
+    "limite_nesting": None,
+    "columnas": [],
+}
+
+
+def cargar_precios(ruta=None):
+    """Lista de precios de la app: `PRECIOS_DEFAULT` más `margen`, pisados por el JSON de `ruta` (si hay)."""
+    lista = {**PRECIOS_DEFAULT, "margen": SPEC_DEFAULT["margen"]}
+    if not ruta: return lista
+    with open(ruta, encoding="utf-8") as f: return {**lista, **json.load(f)}
+
+
+def params_corredera(tipo_corredera):
+    """Devuelve (descuento_guia, clave del precio del par de guías) según el tipo de corredera."""
+    if "Telescópicas" in tipo_corredera or "Push" in tipo_corredera:
+        return 26, "guia"
+    return 25, "guia_comun"
+
+
+@lru_cache(maxsize=None)
+def get_cantos(pieza):
+    if "Frente" in pieza or "Puerta" in pieza or "Hoja" in pieza: return "4L"
+    if "Lat. Caj" in pieza or "Contra" in pieza: return "1L"
+    if "Estante" in pieza or "Techo" in pieza or "Piso" in pieza or "Divisor" in pieza: return "1L"
+    if "Lat. Externo" in pieza: return "1L"
+    return "-"
+
+
+def completar_spec(spec):
+    """Rellena con los valores por defecto las claves que falten en `spec`."""
+    s = {**SPEC_DEFAULT, **spec}
+    s["precios"] = {**PRECIOS_DEFAULT, **spec.get("precios", {})}
+    return s
+
+
+# ==============================================================================
+# 2. DESPIECE
+# ==============================================================================
+def calcular_despiece(spec):
+    """Calcula el despiece y la cotización de un placard.
+
+    Devuelve un dict con `pz` (piezas), `buy` (herrajes), `lineal` (tramos de
+    rieles y barrales), `err` (errores de diseño) y, si no hubo errores,
+    `tabla` (el despiece en columnas), `nesting` (placas por material),
+    `barras` (corte de los materiales lineales), `costos` (desglose), `costo`
+    y `total` (con margen).
+    """
+    s = completar_spec(spec)
+    res = armar_despiece(s)
+    if not res["err"]: cotizar(res, s["precios"], s["margen"], s["limite_nesting"])
+    return res
+
+
+def armar_despiece(spec):
+    """Sólo el despiece (`pz`, `buy`, `lineal`, `err`), sin nesting ni costo."""
+    s = completar_spec(spec)
+    ancho, alto, prof = s["ancho"], s["alto"], s["prof"]
+    espesor, zocalo, veta_frentes = s["espesor"], s["zocalo"], s["veta_frentes"]
+    tipo_corredera, tipo_bisagra = s["tipo_corredera"], s["tipo_bisagra"]
+    tiene_placard, hojas_placard = s["tiene_placard"], s["hojas_placard"]
+    configuracion_columnas = s["columnas"]
+    cant_columnas = len(configuracion_columnas)
+    precios = s["precios"]
+    descuento_guia, clave_guia = params_corredera(tipo_corredera)
+
+    pz = []; buy = []; lineal = []; err = []
+    res = {"pz": pz, "buy": buy, "lineal": lineal, "err": err, "tabla": None, "nesting": None, "barras": None, "costos": None, "costo": None, "total": None}
+
+    def add_p(nombre, cant, largo, ancho, veta, mat, nota=""):
+        c = get_cantos(nombre)
+        pz.append({"Pieza": nombre, "Cant": cant, "Largo": largo, "Ancho": ancho, "Veta": veta, "Mat": mat, "Cantos": c, "Nota": nota})
+
+    if cant_columnas < 1:
+        err.append("El proyecto no tiene columnas."); return res
+
+    # === LÓGICA DE PROFUNDIDAD (PLACARD) ===
+    # Si hay kit corredizo, el interior retrocede ~85mm.
+    prof_int = prof - FONDO_PLACARD if tiene_placard else prof
+
+    # Estructura
+    h_int = alto - zocalo - (espesor * 2); w_int = ancho - (espesor * 2)
+
+    add_p("Lat. Externo", 2, alto, prof, "↕️", f"Mela {espesor}") # Laterales cubren todo
+    add_p("Techo/Piso", 2, w_int, prof, "↔️", f"Mela {espesor}")
+    add_p("Fondo", 1, alto-15, ancho-15, "-", f"Fibro {s['fondo_esp']}")
+
+    # Los divisores verticales usan la profundidad interna reducida
+    if cant_columnas > 1: add_p("Divisor Vert", cant_columnas-1, h_int, prof_int, "↕️", f"Mela {espesor}")
+
+    w_hueco = (w_int - ((cant_columnas - 1) * espesor)) / cant_columnas
+    if w_hueco < HUECO_MIN:
+        err.append(f"Hueco de {w_hueco:.0f}mm muy angosto."); return res
+
+    # === PLACARD SI EXISTE ===
+    if tiene_placard:
+        if not 2 <= hojas_placard <= 4:
+            err.append("Placard necesita 2 a 4 hojas."); return res
+        cruces = hojas_placard - 1
+        solape = 30 # mm
+        wa = (w_int + (cruces * solape)) / hojas_placard
+        add_p("Hoja Corrediza", hojas_placard, alto-zocalo-40, wa, veta_frentes, f"Mela {espesor}", "Kit Placard")
+        # Herrajes del kit por metro; los rieles (superior e inferior) se compran en barras (ver lineal.py)
+        buy.append({"Item": "Kit Corredizo (Herrajes)", "Cant": ancho/1000, "Unidad": "ml", "Costo": precios["kit"]})
+        lineal += [{"Material": "Riel Superior", "Largo": ancho, "Cant": 1}, {"Material": "Riel Inferior", "Largo": ancho, "Cant": 1}]
+
+    # === ITERAR COLUMNAS ===
+    # Cada columna sólo depende de su config y del contexto: se memoiza aparte
+    ctx = Contexto(w_hueco, prof_int, alto, zocalo, espesor, veta_frentes, descuento_guia, tipo_corredera, tipo_bisagra,
+                   precios["bisagra"], precios[clave_guia], precios["piston"])
+    for i, conf in enumerate(configuracion_columnas):
+        p_col, b_col, l_col, e_col = despiece_columna(i, conf, ctx)
+        pz += p_col; buy += b_col; lineal += l_col; err += e_col
+
+    if err: return res
+
+    buy.insert(0, {"Item": "Tornillos 4x50", "Cant": len(pz)*4, "Unidad": "u.", "Costo": 10})
+    return res
+
+
+def cotizar(res, precios, margen, limite_nesting=None):
+    """Completa `res` con la tabla columnar, el nesting, el corte lineal y el costo."""
+    pz = res["pz"]
+    precios = {**PRECIOS_DEFAULT, **precios}
+    res["tabla"] = TablaCorte.desde_pz(pz)
+    res["nesting"] = nesting_cacheado(pz, limite_nesting)
+    # Rieles y barrales se compran en barras enteras: entran al costo como herrajes
+    res["barras"] = optimizar_lineal(res.get("lineal", []) + requerimientos_canto(res["tabla"]))
+    res["buy"] = res["buy"] + compras_lineales(res["barras"], precios)
+    res["costos"] = costear(res["tabla"], res["buy"], sum(r["placas"] for r in res["nesting"].values()), precios)
+    res["costo"] = res["costos"]["costo"]
+    res["total"] = res["costo"] * margen
+    return res
+
+
+# ==============================================================================
+# 3. DESPIECE POR COLUMNA (MEMOIZADO)
+# ==============================================================================
+# Parámetros globales de los que depende el despiece de una columna
+Contexto = namedtuple("Contexto", "w_hueco prof_int alto zocalo espesor veta_frentes descuento_guia tipo_corredera tipo_bisagra c_bis c_guia c_piston")
+
+
+def despiece_columna(i, conf, ctx):
+    """Piezas, herrajes, tramos lineales y errores de la columna `i` (copias, se pueden modificar)."""
+    pz, buy, lineal, err = _despiece_columna(i, json.dumps(conf, sort_keys=True), ctx)
+    return [dict(p) for p in pz], [dict(b) for b in buy], [dict(l) for l in lineal], list(err)
+
+
+@lru_cache(maxsize=4096)
+def _despiece_columna(i, conf_json, ctx):
+    conf = json.loads(conf_json)
+    w_hueco, prof_int, alto, zocalo, espesor, veta_frentes = ctx.w_hueco, ctx.prof_int, ctx.alto, ctx.zocalo, ctx.espesor, ctx.veta_frentes
+    descuento_guia, tipo_corredera, tipo_bisagra = ctx.descuento_guia, ctx.tipo_corredera, ctx.tipo_bisagra
+    precios = {"bisagra": ctx.c_bis, "guia": ctx.c_guia, "piston": ctx.c_piston}
+    pz = []; buy = []; lineal = []; err = []
+
+    def add_p(nombre, cant, largo, ancho, veta, mat, nota=""):
+        # `Columna` identifica la pieza en el diff (las de la estructura no la llevan)
+        c = get_cantos(nombre)
+        pz.append({"Pieza": nombre, "Cant": cant, "Largo": largo, "Ancho": ancho, "Veta": veta, "Mat": mat, "Cantos": c, "Nota": nota, "Columna": i + 1})
+
+    if "Dividida" in conf["modo"]:
+        # Estante fijo usa prof_int
+        add_p(f"Estante Fijo (Div C{i+1})", 1, w_hueco, prof_int, "↔️", f"Mela {espesor}", "Estructural")
+
+    # --- CAJONES ---
+    def do_cajon(pos, cant, h_tot, is_sup):
+        h_disp = h_tot
+        if "Dividida" in conf["modo"] and not is_sup: h_disp -= espesor
+
+        hf = (h_disp - ((cant-1)*3)) / cant
+        if hf < FRENTE_MIN: err.append(f"C{i+1}: Cajón muy bajo."); return
+
+        add_p(f"Frente {pos}", cant, w_hueco-4, hf, veta_frentes, f"Mela {espesor}")
+
+        # Caja de Cajón
+        hl = lateral_cajon(hf)
+        if hl==0: err.append(f"C{i+1}: No entra lateral."); return
+
+        # CÁLCULO DINÁMICO DE GUÍAS (Para no chocar con el placard)
+        lg = largo_guia(prof_int)
+
+        wc = w_hueco - (descuento_guia * 2) - 36
+        add_p("Lat. Cajón", cant*2, lg, hl, "↔️", "Blanca 18")
+        add_p("Contra-Frente", cant, wc, hl, "↔️", "Blanca 18")
+        add_p("Fondo Cajón", cant, lg, wc, "-", "Fibro 3")
+        buy.append({"Item": f"Guías {tipo_corredera} {lg}mm", "Cant": cant, "Unidad": "par", "Costo": precios["guia"]})
+
+    # --- PUERTAS ABATIBLES INTERNAS ---
+    def do_puerta(nom, h, data):
+        ap = data.get("apertura", "Lateral")
+        montaje = data.get("montaje", "Externa")
+        dob = data.get("doble")
+        din = data.get("interior")
+
+        h_real = h - espesor if ("Dividida" in conf["modo"] and "Baja" in nom) else h
+        dw = 4 if "Externa" in montaje else 6
+        dh = 4 if "Externa" in montaje else 6
+
+        hojas = 2 if dob else 1
+        wa = (w_hueco - dw - (2 if dob else 0))/hojas if dob else (w_hueco - dw)
+        ha = h_real - dh
+        if h_real < FRENTE_MIN: err.append(f"C{i+1}: Puerta muy baja."); return
+
+        add_p(f"{nom} ({ap[:3]})", hojas, ha, wa, veta_frentes, f"Mela {espesor}", f"{montaje}")
+
+        if "Lateral" in ap:
+            bi = 2 if ha<900 else (3 if ha<1600 else (4 if ha<2100 else 5))
+            b_tipo = "Codo 18" if "Interna" in montaje else tipo_bisagra
+            buy.append({"Item": f"Bisagras {b_tipo}", "Cant": bi*hojas, "Unidad": "u.", "Costo": precios["bisagra"]})
+        elif "Rebatible" in ap:
+            buy.append({"Item": f"Bisagras {tipo_bisagra}", "Cant": 2, "Unidad": "u.", "Costo": precios["bisagra"]})
+            buy.append({"Item": "Pistón a Gas", "Cant": 1, "Unidad": "u.", "Costo": precios["piston"]})
+
+        if din:
+            # El interior se descuenta respecto a prof_int
+            pint = prof_int - 20 if "Externa" in montaje else prof_int - 40
+            if din["tipo"]=="Estantes":
+                add_p("Estante Int.", din["cant"], w_hueco-2, pint, "↔️", f"Mela {espesor}")
+            elif din["tipo"]=="Cubos":
+                c=din["cols"]; r=din["rows"]
+                if c>1: add_p("Div. Vert. Cubo", c-1, ha-2, pint, "↕️", f"Mela {espesor}")
+                if r>1: add_p("Estante Cubo", r-1, w_hueco-2, pint, "↔️", f"Mela {espesor}")
+
+    # EJECUCIÓN POR TIPO
+    d_inf = conf["inf_data"]; d_sup = conf["sup_data"]
+
+    if conf["inf_tipo"] == "Cajonera": do_cajon("Inf", d_inf["cant"], d_inf["alto"], False)
+    elif "Puerta" in conf["inf_tipo"]: do_puerta(conf["inf_tipo"], d_inf["alto"] if "Baja" in conf["inf_tipo"] else (alto-zocalo), d_inf)
+
+    if "Dividida" in conf["modo"]:
+        h_inf = d_inf.get("alto", 0); h_rest = alto - zocalo - h_inf
+        if conf["sup_tipo"] == "Cajonera": do_cajon("Sup", d_sup["cant"], h_rest, True)
+        elif conf["sup_tipo"] == "Puerta Alta": do_puerta("Puerta Alta", h_rest, d_sup)
+        elif conf["sup_tipo"] == "Estantes": add_p("Estante Móvil", d_sup["cant"], w_hueco-2, prof_int-20, "↔️", f"Mela {espesor}")
+        elif conf["sup_tipo"] == "Barral": lineal.append({"Material": "Barral", "Largo": math.ceil(w_hueco - DESCUENTO_BARRAL), "Cant": 1})
+
+    return tuple(pz), tuple(buy), tuple(lineal), tuple(err)
+
+
+_CAMPOS_NESTING = ("Pieza", "Cant", "Largo", "Ancho", "Veta", "Mat")
+
+
+def nesting_cacheado(pz, limite_s=None):
+    """`optimizar_placas` memoizado sobre las medidas de las piezas (resultado de sólo lectura)."""
+    return _nesting(tuple(tuple(p[k] for k in _CAMPOS_NESTING) for p in pz), limite_s)
+
+
+@lru_cache(maxsize=256)
+def _nesting(piezas, limite_s):
+    return optimizar_placas([dict(zip(_CAMPOS_NESTING, p)) for p in piezas], limite_s=limite_s)
+
+
+# ==============================================================================
+# 4. DIFERENCIAS ENTRE CORRIDAS
+# ==============================================================================
+def diff_despiece(pz_ant, pz_nuevo):
+    """Compara dos despieces y devuelve las piezas agregadas, eliminadas o cambiadas.
+
+    Las piezas se emparejan por módulo, columna, nombre, material y nota (y
+    por orden de aparición si aun así se repiten), así un cambio en una
+    columna no se le atribuye a otra con las mismas piezas.
+    """
+    def indexar(pz):
+        idx, vistos = {}, {}
+        for p in pz:
+            k = (p.get("Modulo", ""), p.get("Columna", 0), p["Pieza"], p["Mat"], p["Nota"])
+            n = vistos[k] = vistos.get(k, -1) + 1
+            idx[k + (n,)] = p
+        return idx
+
+    ant, nuevo = indexar(pz_ant), indexar(pz_nuevo)
+    cambios = []
+    for k, p in nuevo.items():
+        if k not in ant: cambios.append({"Cambio": "Agregada", **p})
+        elif any(ant[k][c] != p[c] for c in ("Cant", "Largo", "Ancho", "Veta", "Cantos")):
+            q = ant[k]
+            cambios.append({"Cambio": "Modificada", **p, "Antes": f"{q['Cant']} x {q['Largo']:.0f}x{q['Ancho']:.0f}"})
+    for k, p in ant.items():
+        if k not in nuevo: cambios.append({"Cambio": "Eliminada", **p})
+    return cambios
+
+
+# ==============================================================================
+# 5. COTIZACIÓN EN LOTE
+# ==============================================================================
+def cotizar_lote(specs, procesos=None, chunksize=64):
+    """Cotiza muchas especificaciones repartiéndolas en un pool de procesos.
+
+    Devuelve los resultados de `calcular_despiece` en el mismo orden que
+    `specs`. Con `procesos=1` se calcula en serie, sin pool.
+    """
+    specs = list(specs)
+    if procesos == 1 or len(specs) <= chunksize:
+        return [calcular_despiece(s) for s in specs]
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        return list(pool.map(calcular_despiece, specs, chunksize=chunksize))
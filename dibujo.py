@@ -0,0 +1,150 @@
+"""Dibujos Plotly del mueble y de las placas, sin depender de Streamlit.
+
+La app los envuelve en `st.cache_data`; los benchmarks y los scripts los
+llaman directo. Plotly se importa recién al armar una figura.
+"""
+import json
+from functools import lru_cache
+
+from nesting import PLACA_ANCHO, PLACA_LARGO
+
+
+# ==============================================================================
+# 1. ELEVACIÓN DEL MUEBLE
+# ==============================================================================
+# Cada columna se cachea por separado: al editar una sola, las demás reusan su dibujo.
+def dibujar_columna(i, conf, ancho_col, columnas, zocalo, alto, espesor_mat, es_push):
+    """Shapes y anotaciones de la columna `i` (listas nuevas, se pueden extender)."""
+    shapes, annotations = _dibujar_columna(i, json.dumps(conf, sort_keys=True), ancho_col, columnas, zocalo, alto, espesor_mat, es_push)
+    return list(shapes), list(annotations)
+
+
+@lru_cache(maxsize=256)
+def _dibujar_columna(i, conf_json, ancho_col, columnas, zocalo, alto, espesor_mat, es_push):
+    conf = json.loads(conf_json)
+    shapes = []; annotations = []
+
+    def manija(cx, cy, orientacion="v"):
+        if not es_push: 
+            if orientacion=="v": shapes.append(dict(type="line", x0=cx, y0=cy-15, x1=cx, y1=cy+15, line=dict(color="#154360", width=4)))
+            else: shapes.append(dict(type="line", x0=cx-15, y0=cy, x1=cx+15, y1=cy, line=dict(color="#154360", width=4)))
+
+    def interior(x0, x1, y0, h, d):
+        if not d: return
+        t=d.get("tipo")
+        if t=="Estantes":
+            c=d["cant"]; p=h/(c+1)
+            for k in range(c): y=y0+(p*(k+1)); shapes.append(dict(type="line", x0=x0+5, y0=y, x1=x1-5, y1=y, line=dict(color="#A04000", width=2, dash="dot")))
+        elif t=="Cubos":
+            cols=d["cols"]; rows=d["rows"]
+            ph=h/rows; pw=(x1-x0)/cols
+            for r in range(1,rows): y=y0+(ph*r); shapes.append(dict(type="line", x0=x0+5, y0=y, x1=x1-5, y1=y, line=dict(color="#A04000", width=2, dash="dot")))
+            for c in range(1,cols): x=x0+(pw*c); shapes.append(dict(type="line", x0=x, y0=y0+5, x1=x, y1=y0+h-5, line=dict(color="#A04000", width=2, dash="dot")))
+
+    xs = i * ancho_col; xe = (i + 1) * ancho_col; yc = zocalo 
+    if i < columnas: shapes.append(dict(type="line", x0=xe, y0=zocalo, x1=xe, y1=alto, line=dict(color="#5D4037", width=2)))
+
+    if "Dividida" in conf["modo"]:
+        y_div = zocalo + conf["inf_data"]["alto"]
+        shapes.append(dict(type="rect", x0=xs, y0=y_div-espesor_mat, x1=xe, y1=y_div, fillcolor="#8B4513", line=dict(width=0)))
+
+    def dibujar_bloque(tipo, data, y_start, h_bloque):
+        if tipo == "Cajonera":
+            c=data["cant"]
+            if c > 0:
+                hu=h_bloque/c
+                for k in range(c): 
+                    yp=y_start+(k*hu)
+                    shapes.append(dict(type="rect", x0=xs+3, y0=yp+2, x1=xe-3, y1=yp+hu-2, fillcolor="#85C1E9", line=dict(color="#2E86C1")))
+                    manija(xs+ancho_col/2, yp+hu/2, "h")
+
+        elif "Puerta" in tipo:
+            interior(xs, xe, y_start, h_bloque, data.get("interior"))
+            colf="rgba(171, 235, 198, 0.6)" if "Baja" in tipo else "rgba(210, 180, 222, 0.6)"
+            dob=data.get("doble"); ap=data.get("apertura", "Lateral")
+            
+            shapes.append(dict(type="rect", x0=xs+3, y0=y_start+2, x1=xe-3, y1=y_start+h_bloque-2, fillcolor=colf, line=dict(color="gray")))
+            
+            if dob: 
+                mid=xs+ancho_col/2
+                shapes.append(dict(type="line", x0=mid, y0=y_start+2, x1=mid, y1=y_start+h_bloque-2, line=dict(color="gray", width=1)))
+                manija(mid-15, y_start+h_bloque/2); manija(mid+15, y_start+h_bloque/2)
+            else: 
+                if "Arriba" in ap: manija(xs+ancho_col/2, y_start+30, "h")
+                elif "Abajo" in ap: manija(xs+ancho_col/2, y_start+h_bloque-30, "h")
+                else: 
+                    px=xe-20 if i%2==0 else xs+20
+                    manija(px, y_start+h_bloque/2)
+
+        elif tipo == "Estantes": interior(xs, xe, y_start, h_bloque, {"tipo":"Estantes","cant":data["cant"]})
+        elif tipo == "Barral": 
+            yb=y_start+(h_bloque*0.2) if h_bloque<500 else y_start+100
+            shapes.append(dict(type="line", x0=xs+10, y0=yb, x1=xe-10, y1=yb, line=dict(color="gray", width=5)))
+            annotations.append(dict(x=xs+ancho_col/2, y=yb-30, text="👕", showarrow=False))
+
+    # INFERIOR
+    h_inf = conf["inf_data"].get("alto", 0)
+    h_util_inf = h_inf - espesor_mat if "Dividida" in conf["modo"] else h_inf
+    dibujar_bloque(conf["inf_tipo"], conf["inf_data"], yc, h_util_inf)
+    yc += h_inf
+
+    # SUPERIOR
+    rest = alto - yc
+    if rest > 0:
+        dibujar_bloque(conf["sup_tipo"], conf["sup_data"], yc, rest)
+
+    return tuple(shapes), tuple(annotations)
+
+
+def dibujar_mueble(ancho, alto, zocalo, columnas, configs, espesor_mat, es_push, flag_placard, num_hojas):
+    import plotly.graph_objects as go
+    # Las figuras se acumulan y se cargan en un único update_layout
+    shapes = []; annotations = []
+
+    # Casco Externo
+    shapes.append(dict(type="rect", x0=0, y0=0, x1=ancho, y1=zocalo, fillcolor="#2C3E50", line=dict(color="black")))
+    shapes.append(dict(type="rect", x0=0, y0=zocalo, x1=ancho, y1=alto, line=dict(color="#5D4037", width=4)))
+    
+    ancho_col = ancho / columnas
+    
+    # DIBUJO DE COLUMNAS INTERNAS
+    for i, conf in enumerate(configs):
+        s, a = dibujar_columna(i, conf, ancho_col, columnas, zocalo, alto, espesor_mat, es_push)
+        shapes += s; annotations += a
+
+    # NUEVO: DIBUJAR PLACARD SOBREPUESTO AL FINAL (Para que se vea translucido encima)
+    if flag_placard:
+        h_hoja = alto - zocalo
+        ancho_h_visual = ancho / num_hojas
+        
+        # Color aluminio translucido
+        color_vidrio = "rgba(220, 230, 235, 0.7)" 
+        color_perfil = "#707B7C"
+        
+        # Rieles
+        shapes.append(dict(type="line", x0=0, y0=zocalo, x1=ancho, y1=zocalo, line=dict(color=color_perfil, width=6)))
+        shapes.append(dict(type="line", x0=0, y0=alto, x1=ancho, y1=alto, line=dict(color=color_perfil, width=6)))
+
+        for h in range(num_hojas):
+            xh = h * ancho_h_visual
+            # Para simular el cruce en 3D, ampliamos ligeramente la visual de la hoja
+            shapes.append(dict(type="rect", x0=xh, y0=zocalo+3, x1=xh+ancho_h_visual+15, y1=alto-3, fillcolor=color_vidrio, line=dict(color=color_perfil, width=2)))
+            # Perfil Manijón Aluminio
+            shapes.append(dict(type="line", x0=xh+10, y0=zocalo+10, x1=xh+10, y1=alto-10, line=dict(color="#515A5A", width=4)))
+
+    fig = go.Figure()
+    fig.update_layout(shapes=shapes, annotations=annotations, margin=dict(t=30, b=0, l=0, r=0), height=350, xaxis=dict(visible=False, range=[-50, ancho+50]), yaxis=dict(visible=False, scaleanchor="x", scaleratio=1, range=[-50, alto+50]), plot_bgcolor="white", title=f"Vista {ancho}x{alto}mm")
+    return fig
+
+
+# ==============================================================================
+# 2. PLACAS DEL NESTING
+# ==============================================================================
+def dibujar_placa(hoja, largo=PLACA_LARGO, ancho_placa=PLACA_ANCHO):
+    import plotly.graph_objects as go
+    shapes = [dict(type="rect", x0=0, y0=0, x1=largo, y1=ancho_placa, line=dict(color="black"))]
+    shapes += [dict(type="rect", x0=p["x"], y0=p["y"], x1=p["x"]+p["Largo"], y1=p["y"]+p["Ancho"], fillcolor="#F5CBA7", line=dict(color="#A04000", width=1)) for p in hoja["piezas"]]
+    fig = go.Figure()
+    fig.update_layout(shapes=shapes, margin=dict(t=30, b=0, l=0, r=0), height=300, xaxis=dict(visible=False, range=[-20, largo+20]), yaxis=dict(visible=False, scaleanchor="x", scaleratio=1, range=[-20, ancho_placa+20]), plot_bgcolor="white", title=f"Uso {hoja['uso']:.0%}")
+    fig.add_trace(go.Scatter(x=[p["x"]+p["Largo"]/2 for p in hoja["piezas"]], y=[p["y"]+p["Ancho"]/2 for p in hoja["piezas"]], text=[f"{p['Pieza']}<br>{p['Largo']:.0f}x{p['Ancho']:.0f}" for p in hoja["piezas"]], mode="markers", marker=dict(opacity=0), hoverinfo="text", showlegend=False))
+    return fig
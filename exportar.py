@@ -0,0 +1,166 @@
+"""Exportación en lote del despiece a los formatos del taller.
+
+Recorre trabajos (specs o proyectos `{"modulos": [...]}`) de a uno y va
+escribiendo sus piezas en el archivo a medida que se calculan, así un lote
+nocturno de cientos de pedidos no se junta nunca en memoria. Los formatos CSV
+mapean `Veta` y `Cantos` a las columnas que importan la seccionadora y el
+optimizador; `parquet` (requiere pyarrow) es columnar comprimido para archivo.
+"""
+import csv
+import gzip
+
+from despiece import armar_despiece
+from nesting import sentido_veta
+from proyecto import despiece_proyecto
+from tabla import COLUMNAS, TRAMOS_CANTO
+
+FILAS_GRUPO = 50_000    # filas por row group de parquet
+
+
+def lados_canto(cantos):
+    """Lados cantoneados `(L1, L2, A1, A2)` según el código de `Cantos`."""
+    n = dict(TRAMOS_CANTO.get(cantos, ()))
+    return n.get("largo", 0) >= 1, n.get("largo", 0) >= 2, n.get("ancho", 0) >= 1, n.get("ancho", 0) >= 2
+
+
+def orientar(p):
+    """`(largo, ancho, veta, lados)` con el Largo a favor de la veta de la placa.
+
+    Las piezas que llevan la veta a lo ancho (p. ej. puertas con veta
+    horizontal) se exportan giradas, con sus cantos, para que "Veta" siempre
+    signifique "a lo largo"; `veta` es False si la pieza se puede rotar.
+    """
+    sentido = sentido_veta(p["Pieza"], p["Veta"])
+    l1, l2, a1, a2 = lados_canto(p["Cantos"])
+    if sentido == "ancho": return p["Ancho"], p["Largo"], True, (a1, a2, l1, l2)
+    return p["Largo"], p["Ancho"], sentido is not None, (l1, l2, a1, a2)
+
+
+def _num(v, decimal="."):
+    """Medida con a lo sumo un decimal ("773.3", "2000")."""
+    s = f"{v:.1f}".rstrip("0").rstrip(".")
+    return s.replace(".", decimal)
+
+
+# ==============================================================================
+# 1. FORMATOS
+# ==============================================================================
+# Cada formato: separador, encabezado y cómo se arma la fila de una pieza
+def _fila_csv(p, trabajo):
+    return [trabajo, p.get("Modulo", "")] + [p[c] for c in COLUMNAS]
+
+
+def _fila_optimizador(p, trabajo):
+    # Veta 1 = no rotar (la veta corre a lo largo); cantos 1/0 por lado
+    largo, ancho, veta, lados = orientar(p)
+    ref = f"{trabajo}/{p['Modulo']}" if p.get("Modulo") else trabajo
+    return [ref, p["Mat"], _num(largo), _num(ancho), p["Cant"], int(veta), *(int(l) for l in lados), p["Pieza"]]
+
+
+def _fila_seccionadora(p, trabajo):
+    # Decimal con coma; cada lado lleva el canto a pegar (del mismo material) o vacío
+    largo, ancho, veta, lados = orientar(p)
+    return [p["Mat"], _num(largo, ","), _num(ancho, ","), p["Cant"], "S" if veta else "N",
+            *(f"Canto {p['Mat']}" if l else "" for l in lados), p["Pieza"], trabajo, p.get("Modulo", "")]
+
+
+FORMATOS = {
+    "csv": (",", ["Trabajo", "Modulo", *COLUMNAS], _fila_csv),
+    "optimizador": (",", ["Ref", "Material", "Largo", "Ancho", "Cantidad", "Veta", "CantoL1", "CantoL2", "CantoA1", "CantoA2", "Descripcion"], _fila_optimizador),
+    "seccionadora": (";", ["Material", "Largo", "Ancho", "Cant", "Veta", "Canto L1", "Canto L2", "Canto A1", "Canto A2", "Pieza", "Trabajo", "Modulo"], _fila_seccionadora),
+}
+
+
+# ==============================================================================
+# 2. RECORRIDO DE TRABAJOS
+# ==============================================================================
+def despieces(trabajos):
+    """Genera `(nombre, pz, err)` por trabajo, sin nesting ni costo (sólo hace falta el despiece)."""
+    for n, t in enumerate(trabajos):
+        nombre = t.get("nombre") or f"T{n+1}"
+        r = despiece_proyecto(t, con_costo=False) if "modulos" in t else armar_despiece(t)
+        yield nombre, r["pz"], r["err"]
+
+
+class _Resumen(dict):
+    def __init__(self):
+        super().__init__(trabajos=0, filas=0, piezas=0, errores=[])
+
+    def sumar(self, nombre, pz, err):
+        if err: self["errores"].append({"trabajo": nombre, "errores": err}); return False
+        self["trabajos"] += 1; self["filas"] += len(pz); self["piezas"] += sum(p["Cant"] for p in pz)
+        return True
+
+
+# ==============================================================================
+# 3. ESCRITORES
+# ==============================================================================
+# Ambos reciben `(nombre, pz, err)` por trabajo (de `despieces` o ya calculados)
+def escribir_csv(f, despiezados, formato="csv"):
+    """Escribe en el archivo de texto `f` las piezas de cada trabajo válido; devuelve el resumen."""
+    sep, encabezado, fila = FORMATOS[formato]
+    w = csv.writer(f, delimiter=sep)
+    w.writerow(encabezado)
+    res = _Resumen()
+    for nombre, pz, err in despiezados:
+        if res.sumar(nombre, pz, err): w.writerows(fila(p, nombre) for p in pz)
+    return res
+
+
+def escribir_despiece(f, pz, formato="csv", nombre=""):
+    """Un solo despiece (la descarga de la app, `--csv` del CLI); devuelve el resumen.
+
+    En "csv" conserva el layout de siempre: las columnas del despiece, con
+    `Modulo` primero si es un proyecto y sin `Trabajo`.
+    """
+    if formato != "csv": return escribir_csv(f, [(nombre, pz, [])], formato)
+    campos = (["Modulo"] if pz and "Modulo" in pz[0] else []) + list(COLUMNAS)
+    w = csv.writer(f)
+    w.writerow(campos); w.writerows([p[c] for c in campos] for p in pz)
+    res = _Resumen(); res.sumar(nombre, pz, [])
+    return res
+
+
+def escribir_parquet(ruta, despiezados, filas_grupo=FILAS_GRUPO):
+    """Parquet con compresión zstd, escrito por row groups de `filas_grupo` filas."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("La exportación a parquet necesita pyarrow (pip install pyarrow).") from e
+
+    esquema = pa.schema([("Trabajo", pa.string()), ("Modulo", pa.string()), ("Pieza", pa.string()), ("Cant", pa.int32()),
+                         ("Largo", pa.float64()), ("Ancho", pa.float64()), ("Veta", pa.string()), ("Mat", pa.string()),
+                         ("Cantos", pa.string()), ("Nota", pa.string())])
+    campos = esquema.names
+    res = _Resumen()
+    buf = {c: [] for c in campos}
+
+    def volcar():
+        if buf["Pieza"]:
+            w.write_table(pa.table(buf, schema=esquema))
+            for v in buf.values(): v.clear()
+
+    with pq.ParquetWriter(ruta, esquema, compression="zstd") as w:
+        for nombre, pz, err in despiezados:
+            if not res.sumar(nombre, pz, err): continue
+            for p in pz:
+                buf["Trabajo"].append(nombre); buf["Modulo"].append(p.get("Modulo", ""))
+                for c in COLUMNAS: buf[c].append(p[c])
+            if len(buf["Pieza"]) >= filas_grupo: volcar()
+        volcar()
+    return res
+
+
+def exportar(trabajos, ruta, formato="csv", filas_grupo=FILAS_GRUPO):
+    """Exporta el despiece de `trabajos` (cualquier iterable, se consume de a uno) a `ruta`.
+
+    `formato` es "parquet" o una clave de `FORMATOS`; con CSV, si `ruta`
+    termina en ".gz" se comprime al vuelo. Los trabajos con errores de diseño
+    no se exportan y quedan listados en el resumen que se devuelve.
+    """
+    if formato == "parquet": return escribir_parquet(ruta, despieces(trabajos), filas_grupo)
+    if formato not in FORMATOS: raise ValueError(f"Formato desconocido: {formato} (opciones: parquet, {', '.join(FORMATOS)})")
+    abrir = gzip.open if ruta.endswith(".gz") else open
+    with abrir(ruta, "wt", newline="", encoding="utf-8") as f:
+        return escribir_csv(f, despieces(trabajos), formato)
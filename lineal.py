@@ -0,0 +1,126 @@
+"""Optimizador de materiales lineales (corte 1D): rieles, barrales y canto.
+
+Los largos requeridos salen del despiece (`res["lineal"]`: rieles del placard
+y barrales de cada hueco) y de la tabla de corte (un tramo de canto por lado
+cantoneado). Se acomodan en las barras o rollos que se compran con un best
+fit decreciente sobre largos agrupados, de modo que lotes de miles de
+módulos se resuelven en una pasada por largo distinto.
+"""
+from bisect import bisect_left
+from collections import Counter
+
+import numpy as np
+
+# Largo comercial (mm) y pérdida por corte (mm) de cada material lineal
+STOCK = {
+    "Riel Superior": {"largo": 3000, "kerf": 3},   # perfiles distintos: no se cortan de la misma barra
+    "Riel Inferior": {"largo": 3000, "kerf": 3},
+    "Barral": {"largo": 3000, "kerf": 3},
+    "Canto": {"largo": 100_000, "kerf": 0},
+}
+DESCUENTO_BARRAL = 10   # mm, holgura de los soportes dentro del hueco
+SOBRANTE_CANTO = 30     # mm extra por tramo para el refilado
+
+
+def tipo_stock(material):
+    """"Canto (Mela 18)" -> "Canto"."""
+    return material.split(" (")[0]
+
+
+# ==============================================================================
+# 1. REQUERIMIENTOS
+# ==============================================================================
+def requerimientos_canto(tabla, sobrante=SOBRANTE_CANTO):
+    """Tramos de canto por material de la pieza, agrupados por largo (mm, redondeado hacia arriba)."""
+    mat, largo, cant = tabla.tramos_canto()
+    if not len(cant): return []
+    largo = np.ceil(largo + sobrante).astype(np.int64)
+    claves, inv = np.unique(np.stack([mat, largo]), axis=1, return_inverse=True)
+    tot = np.bincount(inv.ravel(), weights=cant)
+    cats = tabla.mat[1]
+    return [{"Material": f"Canto ({cats[m]})", "Largo": int(l), "Cant": int(c)} for (m, l), c in zip(claves.T.tolist(), tot) if c]
+
+
+# ==============================================================================
+# 2. EMPAQUE 1D
+# ==============================================================================
+def empacar(largos, cants, stock, kerf=0):
+    """Best fit decreciente de `cants[i]` tramos de `largos[i]` mm en barras de `stock` mm.
+
+    Los tramos más largos que la barra se arman con barras enteras más un
+    resto (empalmes). Devuelve `(barras, patrones, empalmes)`, donde cada
+    patrón es `(((largo, cant), ...), barras_iguales)`.
+    """
+    cap = stock + kerf
+    rems, ids, barras = [], [], []  # restos libres (ascendente), su barra y los cortes de cada barra
+    empalmes = 0
+    for L, n in sorted(zip(largos, cants), reverse=True):
+        L, n = int(L), int(n)
+        if n <= 0: continue
+        if L > stock:
+            enteras, L = divmod(L, stock)
+            barras += [[[stock, 1]] for _ in range(n * enteras)]
+            empalmes += n * (enteras if L else enteras - 1)
+            if not L: continue
+        w = L + kerf
+        while n:
+            k = bisect_left(rems, w)
+            if k == len(rems):
+                # Ninguna barra abierta alcanza: se abren las nuevas que hagan falta
+                q = cap // w
+                for _ in range((n + q - 1) // q):
+                    m = min(n, q); n -= m
+                    barras.append([[L, m]])
+                    k = bisect_left(rems, cap - m * w)
+                    rems.insert(k, cap - m * w); ids.insert(k, len(barras) - 1)
+                continue
+            r, b = rems.pop(k), ids.pop(k)
+            m = min(n, r // w); n -= m
+            cortes = barras[b]
+            if cortes[-1][0] == L: cortes[-1][1] += m
+            else: cortes.append([L, m])
+            k = bisect_left(rems, r - m * w)
+            rems.insert(k, r - m * w); ids.insert(k, b)
+    patrones = Counter(tuple(map(tuple, c)) for c in barras)
+    return len(barras), patrones.most_common(), empalmes
+
+
+def optimizar_lineal(reqs, stock=STOCK):
+    """Compra por material lineal: `{material: {stock, barras, requerido_m, desperdicio_m, desperdicio_pct, empalmes, patrones}}`."""
+    grupos = {}
+    for r in reqs:
+        g = grupos.setdefault(r["Material"], Counter())
+        g[r["Largo"]] += r["Cant"]
+    out = {}
+    for material, g in sorted(grupos.items()):
+        st = stock[tipo_stock(material)]
+        largos, cants = np.fromiter(g.keys(), np.int64, len(g)), np.fromiter(g.values(), np.int64, len(g))
+        n, patrones, empalmes = empacar(largos, cants, st["largo"], st["kerf"])
+        requerido = int(largos @ cants)
+        out[material] = {
+            "stock": st["largo"], "barras": n,
+            "requerido_m": requerido / 1000, "desperdicio_m": (n * st["largo"] - requerido) / 1000,
+            "desperdicio_pct": 1 - requerido / (n * st["largo"]) if n else 0.0,
+            "empalmes": empalmes, "patrones": patrones,
+        }
+    return out
+
+
+# ==============================================================================
+# 3. COMPRA
+# ==============================================================================
+def compras_lineales(barras, precios):
+    """Líneas de compra (formato `buy`) para rieles y barrales.
+
+    Cada barra de riel se cotiza con el precio `riel`; los herrajes del kit
+    (rodamientos, guías) van aparte en el despiece. El canto se sigue
+    cotizando por metro, sus rollos son informativos.
+    """
+    buy = []
+    for material, r in barras.items():
+        tipo = tipo_stock(material)
+        if tipo.startswith("Riel"):
+            buy.append({"Item": f"{tipo} Placard {r['stock']}mm", "Cant": r["barras"], "Unidad": "barra", "Costo": precios["riel"]})
+        elif tipo == "Barral":
+            buy.append({"Item": f"Barral (tubo {r['stock']}mm)", "Cant": r["barras"], "Unidad": "tubo", "Costo": precios["barral"]})
+    return buy
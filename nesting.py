@@ -0,0 +1,178 @@
+"""Optimizador de placas (nesting guillotina 2D) para el despiece.
+
+Acomoda las piezas de `pz` en placas de melamina con cortes guillotina
+(los que hace la escuadradora), respetando la veta y el espesor de sierra. La
+veta de la placa corre a lo largo (`PLACA_LARGO`).
+"""
+import math
+import time
+from functools import lru_cache
+
+PLACA_LARGO = 2600  # mm, sentido de la veta
+PLACA_ANCHO = 1830  # mm
+KERF = 4            # mm, espesor de sierra
+
+# Piezas cuyo Largo va vertical en el mueble (en el resto va horizontal)
+LARGO_VERTICAL = ("Lat. Externo", "Divisor Vert", "Div. Vert", "Puerta", "Hoja")
+
+
+@lru_cache(maxsize=None)
+def sentido_veta(pieza, veta):
+    """Hacia dónde tiene que correr la veta de la placa: "largo", "ancho" o None (se puede girar).
+
+    `veta` es cómo se ve la pieza montada ("↔️" horizontal, "↕️" vertical); se
+    traduce a la medida de la pieza según hacia dónde va su Largo. Así una
+    puerta (Largo = alto) con veta "↔️" lleva la veta a lo ancho.
+    """
+    if veta in ("-", "", None): return None
+    return "largo" if ("↕" in veta) == pieza.startswith(LARGO_VERTICAL) else "ancho"
+
+
+def placas_heuristica(pz):
+    """Estimación histórica por área: +30% de desperdicio sobre 4.75 m²."""
+    return math.ceil(sum([p["Largo"]*p["Ancho"]*p["Cant"] for p in pz if "Mela" in p["Mat"]])/1e6*1.3/4.75)
+
+
+# ==============================================================================
+# 1. EMPAQUE GUILLOTINA
+# ==============================================================================
+class _Placa:
+    __slots__ = ("libres", "piezas", "area", "max_w", "max_h")
+
+    def __init__(self, largo, ancho):
+        # Cada rectángulo libre es [x, y, largo, ancho] ya con el kerf sumado
+        self.libres = [[0, 0, largo, ancho]]
+        self.piezas = []
+        self.area = 0
+        self.max_w, self.max_h = largo, ancho
+
+    def puede(self, w, h, rota):
+        """Descarte rápido: ningún rectángulo libre alcanza la medida."""
+        return (w <= self.max_w and h <= self.max_h) or (rota and h <= self.max_w and w <= self.max_h)
+
+
+def _elegir(placa, w, h, rota):
+    """Mejor rectángulo libre (best short side fit). Devuelve (score, idx, rot)."""
+    mejor = None
+    for k, (_, _, fw, fh) in enumerate(placa.libres):
+        if w <= fw and h <= fh:
+            s = min(fw - w, fh - h)
+            if mejor is None or s < mejor[0]: mejor = (s, k, False)
+        if rota and h <= fw and w <= fh:
+            s = min(fw - h, fh - w)
+            if mejor is None or s < mejor[0]: mejor = (s, k, True)
+    return mejor
+
+
+def _colocar(placa, k, w, h):
+    x, y, fw, fh = placa.libres.pop(k)
+    rw, rh = fw - w, fh - h
+    # Corte por el eje más corto del sobrante (shorter axis split)
+    if rw < rh:
+        a = [x + w, y, rw, h]; b = [x, y + h, fw, rh]
+    else:
+        a = [x + w, y, rw, fh]; b = [x, y + h, w, rh]
+    for r in (a, b):
+        if r[2] > 0 and r[3] > 0: placa.libres.append(r)
+    placa.max_w = max((r[2] for r in placa.libres), default=0)
+    placa.max_h = max((r[3] for r in placa.libres), default=0)
+    return x, y
+
+
+def _empacar(items, largo, ancho, kerf):
+    placas = []
+    L, A = largo + kerf, ancho + kerf
+    for it in items:
+        w, h = it["Largo"] + kerf, it["Ancho"] + kerf
+        rota = it["rota"]
+        mejor = None
+        for placa in placas:
+            if not placa.puede(w, h, rota): continue
+            m = _elegir(placa, w, h, rota)
+            if m and (mejor is None or m[0] < mejor[0]): mejor = (m[0], placa, m[1], m[2])
+        if mejor is None:
+            placa = _Placa(L, A); placas.append(placa)
+            m = _elegir(placa, w, h, rota)
+            mejor = (m[0], placa, m[1], m[2])
+        _, placa, k, rot = mejor
+        pw, ph = (h, w) if rot else (w, h)
+        x, y = _colocar(placa, k, pw, ph)
+        placa.piezas.append({"Pieza": it["Pieza"], "x": x, "y": y, "Largo": pw - kerf, "Ancho": ph - kerf, "Rotada": rot or it["girada"]})
+        placa.area += it["Largo"] * it["Ancho"]
+    return placas
+
+
+def _empacar_por_bloques(items, largo, ancho, kerf, bloque):
+    """Parte la lista ya ordenada en bloques intercalados y los empaca por separado.
+
+    Cada bloque conserva la mezcla de piezas grandes y chicas, así que el
+    desperdicio extra es apenas la última placa de cada bloque y el tiempo
+    pasa a ser lineal en la cantidad de piezas.
+    """
+    n = max(1, -(-len(items) // bloque))
+    placas = []
+    for k in range(n):
+        placas += _empacar(items[k::n], largo, ancho, kerf)
+    return placas
+
+
+ORDENES = {
+    "area": lambda it: -(it["Largo"] * it["Ancho"]),
+    "lado": lambda it: -max(it["Largo"], it["Ancho"]),
+    "perimetro": lambda it: -(it["Largo"] + it["Ancho"]),
+}
+
+
+# ==============================================================================
+# 2. API
+# ==============================================================================
+def optimizar_material(pz, largo=PLACA_LARGO, ancho=PLACA_ANCHO, kerf=KERF, limite_s=None, bloque=400):
+    """Empaca las piezas de un único material.
+
+    Prueba varios órdenes de colocación y se queda con el que usa menos placas.
+    Con `limite_s` (modo acotado) deja de probar órdenes al agotar el tiempo y
+    empaca en bloques de `bloque` piezas, de modo que el primer orden, que se
+    completa siempre, cuesta tiempo lineal en trabajos grandes.
+    """
+    t0 = time.perf_counter()
+    items, sin_lugar = [], []
+    for p in pz:
+        # La veta de la placa corre a lo largo: si la pieza la pide a lo ancho, entra girada
+        sentido = sentido_veta(p["Pieza"], p["Veta"])
+        rota, girada = sentido is None, sentido == "ancho"
+        L, A = (p["Ancho"], p["Largo"]) if girada else (p["Largo"], p["Ancho"])
+        entra = (L <= largo and A <= ancho) or (rota and A <= largo and L <= ancho)
+        it = {"Pieza": p["Pieza"], "Largo": L, "Ancho": A, "rota": rota, "girada": girada}
+        for _ in range(int(p["Cant"])):
+            (items if entra else sin_lugar).append(it)
+
+    mejor = None
+    for nombre, clave in ORDENES.items():
+        orden = sorted(items, key=clave)
+        if limite_s is None: placas = _empacar(orden, largo, ancho, kerf)
+        else: placas = _empacar_por_bloques(orden, largo, ancho, kerf, bloque)
+        # Desempate: menos placas y, a igual cantidad, la última más vacía
+        score = (len(placas), placas[-1].area if placas else 0)
+        if mejor is None or score < mejor[0]: mejor = (score, nombre, placas)
+        if limite_s is not None and time.perf_counter() - t0 > limite_s: break
+
+    _, orden, placas = mejor
+    area_placa = largo * ancho
+    hojas = [{"piezas": pl.piezas, "uso": pl.area / area_placa} for pl in placas]
+    return {
+        "placas": len(hojas) + len(sin_lugar), "hojas": hojas, "orden": orden,
+        "sin_lugar": [it["Pieza"] for it in sin_lugar],
+        "segundos": time.perf_counter() - t0,
+    }
+
+
+def optimizar_placas(pz, mat="Mela", **kw):
+    """Nesting de todas las piezas cuyo material contiene `mat`, agrupado por material.
+
+    Devuelve `{material: resultado}` (ver `optimizar_material`). Las piezas que
+    no entran en una placa se cuentan como una placa entera cada una.
+    """
+    grupos = {}
+    for p in pz:
+        if mat in p["Mat"]: grupos.setdefault(p["Mat"], []).append(p)
+    return {m: optimizar_material(g, **kw) for m, g in grupos.items()}
@@ -0,0 +1,60 @@
+"""Medición de tiempos por fase de cada ejecución de la app.
+
+Una `Corrida` junta las fases medidas en un rerun (widgets de columnas,
+dibujo, despiece, render de tablas...) con datos del diseño que las produjo
+(columnas, piezas, hash de la spec), para detectar regresiones a medida que
+crecen los diseños. Al cerrarse se emite como una línea JSON por el logger
+`carpinteria.perfil`; si está definida `CARPINTERIA_PERF_LOG` se agrega
+además a ese archivo.
+"""
+import json
+import logging
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from time import perf_counter
+
+log = logging.getLogger("carpinteria.perfil")
+
+RUTA_LOG = os.environ.get("CARPINTERIA_PERF_LOG")
+if RUTA_LOG and not any(isinstance(h, logging.FileHandler) for h in log.handlers):
+    _h = logging.FileHandler(RUTA_LOG, encoding="utf-8")
+    _h.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(_h); log.setLevel(logging.INFO)
+
+
+class Corrida:
+    """Fases medidas de una ejecución (`tipo` "app" o el nombre del fragmento)."""
+
+    def __init__(self, tipo="app"):
+        self.tipo = tipo
+        self.inicio = datetime.now().isoformat(timespec="milliseconds")
+        self.fases = []
+        self.datos = {}
+        self._t0 = perf_counter()
+        self.total_ms = None
+
+    @contextmanager
+    def fase(self, nombre, **datos):
+        """Mide el bloque; `datos` (y lo que se agregue al dict que devuelve) queda en la fase."""
+        t0 = perf_counter()
+        try: yield datos
+        finally: self.fases.append({"fase": nombre, "ms": round((perf_counter() - t0) * 1000, 3), **datos})
+
+    def anotar(self, **datos):
+        """Datos del diseño asociados a la corrida (columnas, piezas, hash...)."""
+        self.datos.update(datos)
+
+    def cerrar(self):
+        if self.total_ms is None:
+            self.total_ms = round((perf_counter() - self._t0) * 1000, 3)
+            log.info(json.dumps(self.a_dict(), ensure_ascii=False, default=str))
+        return self
+
+    def a_dict(self):
+        return {"tipo": self.tipo, "inicio": self.inicio, "total_ms": self.total_ms, "datos": self.datos, "fases": self.fases}
+
+
+def a_json(corridas):
+    """Corridas como líneas JSON (una por corrida), para exportar."""
+    return "\n".join(json.dumps(c.a_dict() if isinstance(c, Corrida) else c, ensure_ascii=False, default=str) for c in corridas)
@@ -0,0 +1,61 @@
+"""Proyectos multi-módulo: varios muebles con un único despiece agregado.
+
+Un proyecto es `{"nombre", "modulos": [spec, ...]}` más los parámetros
+compartidos (`precios`, `margen`, `limite_nesting`). Cada módulo es una spec
+del motor (`despiece.calcular_despiece`) con un `nombre`; lo que no defina lo
+toma del proyecto. Las piezas de todos los módulos se agrupan por material y
+espesor para hacer un solo nesting y una sola compra; rieles, barrales y
+canto se cortan de las mismas barras para todo el proyecto.
+"""
+from despiece import PRECIOS_DEFAULT, SPEC_DEFAULT, armar_despiece, cotizar
+
+# El nesting de un proyecto grande corre en modo acotado por defecto
+LIMITE_NESTING_PROYECTO = 2.0
+
+
+def agrupar_herrajes(buy):
+    """Suma las cantidades de los ítems con igual nombre, unidad y costo."""
+    tot = {}
+    for b in buy:
+        k = (b["Item"], b["Unidad"], b["Costo"])
+        tot[k] = tot.get(k, 0) + b["Cant"]
+    return [{"Item": i, "Cant": c, "Unidad": u, "Costo": cu} for (i, u, cu), c in tot.items()]
+
+
+def despiece_proyecto(proyecto, con_costo=True):
+    """Despiece y cotización agregados de todos los módulos del proyecto.
+
+    Devuelve el mismo formato que `calcular_despiece` (con la columna
+    `Modulo` en cada pieza, ordenadas por material) más `modulos`, un resumen
+    por módulo (los nombres repetidos se numeran). Los errores se prefijan
+    con el nombre del módulo y, si hay
+    alguno, el proyecto no se cotiza. Con `con_costo=False` sólo se arma el
+    despiece (sin nesting ni costo).
+    """
+    comunes = {k: v for k, v in proyecto.items() if k not in ("nombre", "modulos")}
+    precios = {**PRECIOS_DEFAULT, **proyecto.get("precios", {})}
+    pz, buy, lineal, err, resumen = [], [], [], [], []
+
+    usados = set()
+    for n, modulo in enumerate(proyecto["modulos"]):
+        # El nombre identifica al módulo en el despiece: si se repite se numera
+        base = nombre = modulo.get("nombre") or f"M{n+1}"
+        k = 1
+        while nombre in usados: k += 1; nombre = f"{base} ({k})"
+        usados.add(nombre)
+        s = {**SPEC_DEFAULT, **comunes, **modulo, "precios": precios}
+        r = armar_despiece(s)
+        pz += [{"Modulo": nombre, **p} for p in r["pz"]]
+        buy += r["buy"]
+        lineal += r["lineal"]
+        err += [f"{nombre}: {e}" for e in r["err"]]
+        resumen.append({"Modulo": nombre, "Medidas": f"{s['ancho']}x{s['alto']}x{s['prof']}",
+                        "Columnas": len(s["columnas"]), "Piezas": sum(p["Cant"] for p in r["pz"]), "Errores": len(r["err"])})
+
+    # Agrupado por material (que ya incluye el espesor, p. ej. "Mela 18")
+    pz.sort(key=lambda p: p["Mat"])
+    res = {"pz": pz, "buy": agrupar_herrajes(buy), "lineal": lineal, "err": err, "tabla": None, "nesting": None,
+           "barras": None, "costos": None, "costo": None, "total": None, "modulos": resumen}
+    if con_costo and not err:
+        cotizar(res, precios, proyecto.get("margen", SPEC_DEFAULT["margen"]), proyecto.get("limite_nesting", LIMITE_NESTING_PROYECTO))
+    return res
@@ -0,0 +1,70 @@
+"""Tablas de factibilidad del diseño.
+
+Reúne las reglas que el motor valida al procesar (alto mínimo de frente,
+lateral de cajón que entra, ancho mínimo de hueco, largo de guía) y las
+precalcula una vez por juego de parámetros, para que los widgets sólo
+ofrezcan valores que el despiece va a aceptar.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+LUZ_CAJONES = 3               # mm entre frentes
+FRENTE_MIN = 70               # mm, frente más bajo admitido
+LATERALES = (180, 150, 100)   # mm, alturas de lateral de cajón disponibles
+HOLGURA_LATERAL = 10          # mm libres sobre el lateral
+DESCUENTO_CAJA = 30           # mm del frente que no usa la caja
+HUECO_MIN = 150               # mm, ancho mínimo de columna
+GUIA_MIN, GUIA_MAX, GUIA_PASO = 250, 550, 50
+FONDO_PLACARD = 85            # mm que ocupan los rieles del placard
+
+# Frente mínimo para que entre el lateral más bajo
+FRENTE_MIN_CAJA = max(FRENTE_MIN, LATERALES[-1] + HOLGURA_LATERAL + DESCUENTO_CAJA)
+
+
+def lateral_cajon(hf):
+    """Alto de lateral para un frente de `hf` mm (0 si no entra ninguno)."""
+    espacio = hf - DESCUENTO_CAJA
+    for size in LATERALES:
+        if espacio >= (size + HOLGURA_LATERAL): return size
+    return 0
+
+
+def largo_guia(prof_int):
+    """Largo de guía comercial que entra en la profundidad interna."""
+    return min(GUIA_MAX, max(GUIA_MIN, int((prof_int - 15) // GUIA_PASO) * GUIA_PASO))
+
+
+Factibilidad = namedtuple("Factibilidad", "alto_util prof_int max_columnas largo_guia max_cajones")
+
+
+@lru_cache(maxsize=256)
+def tabla_factibilidad(ancho, alto, prof, zocalo, espesor, tiene_placard):
+    """Precalcula los rangos válidos para un juego de parámetros del casco.
+
+    `max_cajones[h]` es la mayor cantidad de cajones que entra en `h` mm
+    disponibles (ya descontado el estante fijo si corresponde).
+    """
+    alto_util = alto - zocalo
+    prof_int = prof - FONDO_PLACARD if tiene_placard else prof
+    w_int = ancho - 2 * espesor
+    n = np.arange(1, 11)
+    w_hueco = (w_int - (n - 1) * espesor) / n
+    max_columnas = int(n[w_hueco >= HUECO_MIN].max()) if (w_hueco >= HUECO_MIN).any() else 0
+
+    h = np.arange(max(alto, 0) + 1)
+    # cant cajones entra si (h - (cant-1)*luz) / cant >= frente mínimo con caja
+    max_cajones = np.maximum((h + LUZ_CAJONES) // (FRENTE_MIN_CAJA + LUZ_CAJONES), 0).astype(np.int32)
+    return Factibilidad(alto_util, prof_int, max_columnas, largo_guia(prof_int), max_cajones)
+
+
+def alto_minimo(zocalo, espesor):
+    """Alto total más bajo que deja lugar a un frente entre techo y piso."""
+    return zocalo + 2 * espesor + FRENTE_MIN
+
+
+def max_cajones(f, h_disp):
+    """Cajones que entran en `h_disp` mm según la tabla `f` (0 si ninguno)."""
+    if h_disp <= 0: return 0
+    return int(f.max_cajones[min(int(h_disp), len(f.max_cajones) - 1)])
@@ -0,0 +1,110 @@
+"""Tabla de corte columnar y costeo vectorizado.
+
+El despiece se arma como lista de dicts (`pz`); para costear y mostrar se
+pasa a columnas NumPy tipadas, con `Mat`, `Veta` y `Cantos` codificados como
+categorías, de modo que el costo de cortes con decenas de miles de filas se
+resuelve con un puñado de operaciones vectoriales.
+"""
+import numpy as np
+
+COLUMNAS = ("Pieza", "Cant", "Largo", "Ancho", "Veta", "Mat", "Cantos", "Nota")
+CATEGORICAS = ("Veta", "Mat", "Cantos")
+
+# Lados cantoneados por unidad según el código de `Cantos`: (medida, veces)
+TRAMOS_CANTO = {
+    "4L": (("largo", 2), ("ancho", 2)),
+    "1L": (("largo", 1),),
+    "-": (),
+}
+
+
+def _categorizar(valores):
+    cats, codigos = np.unique(np.asarray(valores, dtype=object).astype(str), return_inverse=True)
+    return codigos.astype(np.int32), tuple(cats)
+
+
+class TablaCorte:
+    """Despiece en columnas: `cant` int, `largo`/`ancho` float y categorías para `Veta`, `Mat` y `Cantos`."""
+
+    def __init__(self, pieza, cant, largo, ancho, veta, mat, cantos, nota):
+        self.pieza = np.asarray(pieza, dtype=object)
+        self.cant = np.asarray(cant, dtype=np.int64)
+        self.largo = np.asarray(largo, dtype=np.float64)
+        self.ancho = np.asarray(ancho, dtype=np.float64)
+        self.nota = np.asarray(nota, dtype=object)
+        # (códigos, categorías)
+        self.veta, self.mat, self.cantos = veta, mat, cantos
+
+    @classmethod
+    def desde_pz(cls, pz):
+        col = {c: [p[c] for p in pz] for c in COLUMNAS}
+        return cls(col["Pieza"], col["Cant"], col["Largo"], col["Ancho"],
+                   _categorizar(col["Veta"]), _categorizar(col["Mat"]), _categorizar(col["Cantos"]), col["Nota"])
+
+    def __len__(self):
+        return len(self.cant)
+
+    def columna(self, nombre):
+        """Valores decodificados de una columna categórica ("Veta", "Mat" o "Cantos")."""
+        codigos, cats = getattr(self, nombre.lower())
+        return np.asarray(cats, dtype=object)[codigos] if len(cats) else np.zeros(0, dtype=object)
+
+    def mascara_mat(self, texto):
+        """Filas cuyo material contiene `texto` (p. ej. "Mela")."""
+        codigos, cats = self.mat
+        return np.isin(codigos, [k for k, c in enumerate(cats) if texto in c])
+
+    def area_m2(self, mascara=None):
+        a = self.largo * self.ancho * self.cant / 1e6
+        return float(a[mascara].sum() if mascara is not None else a.sum())
+
+    def metros_canto(self):
+        """Metros de canto por fila (ya multiplicados por `Cant`)."""
+        codigos, cats = self.cantos
+        m = np.zeros(len(self))
+        for k, c in enumerate(cats):
+            sel = codigos == k
+            for lado, veces in TRAMOS_CANTO.get(c, ()): m[sel] += veces * getattr(self, lado)[sel]
+        return m * self.cant / 1000
+
+    def tramos_canto(self):
+        """Un tramo por lado cantoneado: `(código de Mat, largo mm, cantidad)` como arrays."""
+        codigos, cats = self.cantos
+        mat, largo, cant = [np.zeros(0, np.int32)], [np.zeros(0)], [np.zeros(0, np.int64)]
+        for k, c in enumerate(cats):
+            sel = codigos == k
+            for lado, veces in TRAMOS_CANTO.get(c, ()):
+                mat.append(self.mat[0][sel]); largo.append(getattr(self, lado)[sel]); cant.append(self.cant[sel] * veces)
+        return np.concatenate(mat), np.concatenate(largo), np.concatenate(cant)
+
+    def a_dataframe(self):
+        import pandas as pd
+        df = pd.DataFrame({"Pieza": self.pieza, "Cant": self.cant, "Largo": self.largo, "Ancho": self.ancho, "Nota": self.nota})
+        for c in CATEGORICAS:
+            codigos, cats = getattr(self, c.lower())
+            df[c] = pd.Categorical.from_codes(codigos, categories=list(cats)) if len(cats) else pd.Categorical([])
+        return df[list(COLUMNAS)]
+
+
+# ==============================================================================
+# COSTEO
+# ==============================================================================
+def costear(tabla, buy, placas, precios):
+    """Costo del proyecto en una pasada vectorizada.
+
+    `placas` es la cantidad de placas de melamina (del nesting). Devuelve el
+    desglose: área de melamina, metros de canto, total de herrajes y costo.
+    """
+    cant = np.fromiter((b["Cant"] for b in buy), dtype=np.float64, count=len(buy))
+    unit = np.fromiter((b["Costo"] for b in buy), dtype=np.float64, count=len(buy))
+    canto_ml = float(tabla.metros_canto().sum())
+    d = {
+        "area_mela_m2": tabla.area_m2(tabla.mascara_mat("Mela")),
+        "placas": placas,
+        "canto_ml": canto_ml,
+        "costo_placas": placas * precios["placa"],
+        "costo_canto": canto_ml * precios["canto"],
+        "costo_herrajes": float(cant @ unit),
+    }
+    d["costo"] = d["costo_placas"] + d["costo_canto"] + d["costo_herrajes"]
+    return d
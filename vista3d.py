@@ -0,0 +1,202 @@
+"""Vista 3D (armada o explotada) del mueble como unas pocas mallas Plotly.
+
+Cada tablero del modelo de columnas se vuelve una caja `(x0, y0, z0, x1, y1,
+z1)` en mm (x a lo ancho, y desde el frente hacia el fondo, z hacia arriba)
+con las mismas reglas de medidas que el despiece. Las cajas se agrupan por
+categoría y cada grupo se emite como un único `Mesh3d` armado con NumPy,
+así un proyecto de cientos de módulos sigue siendo un puñado de trazas.
+El modelo de cajas no depende de Plotly, que se importa sólo en `figura_3d`.
+"""
+import numpy as np
+
+from despiece import completar_spec, params_corredera
+from restricciones import FONDO_PLACARD, LUZ_CAJONES, largo_guia, lateral_cajon
+
+# Color y opacidad por categoría (una malla cada una)
+CATEGORIAS = {
+    "Casco": ("#D7B899", 1.0),
+    "Fondo": ("#A1887F", 1.0),
+    "Interior": ("#E5CBA8", 1.0),
+    "Frentes": ("#85C1E9", 1.0),
+    "Cajones": ("#F2F3F4", 1.0),
+    "Placard": ("#D6EAF8", 0.35),
+    "Herrajes": ("#626567", 1.0),
+}
+SEPARACION = 150        # mm entre módulos de un proyecto
+EXPLOSION = 0.35        # fracción de la distancia al centro del módulo que se separa cada pieza
+AVANCE_FRENTES = 250    # mm extra que avanzan frentes y hojas en la vista explotada
+PIEZA_CHICA = 0.03      # m², en baja resolución se omiten piezas cuya cara mayor es menor
+
+# Vértices y triángulos de una caja unitaria
+_VERTICES = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]])
+_TRIANGULOS = np.array([[0, 1, 2], [0, 2, 3], [4, 6, 5], [4, 7, 6], [0, 4, 5], [0, 5, 1],
+                        [1, 5, 6], [1, 6, 2], [2, 6, 7], [2, 7, 3], [3, 7, 4], [3, 4, 0]])
+_ARISTAS = np.array([0, 1, 2, 3, 0, 4, 5, 6, 7, 4, 5, 1, 2, 6, 7, 3])
+
+
+# ==============================================================================
+# 1. MODELO
+# ==============================================================================
+def cajas_mueble(spec):
+    """Cajas por categoría de un módulo, `{categoria: array (n, 6)}`, con origen en su esquina frontal inferior izquierda."""
+    s = completar_spec(spec)
+    ancho, alto, prof, esp, zocalo = s["ancho"], s["alto"], s["prof"], s["espesor"], s["zocalo"]
+    columnas = s["columnas"]
+    n = max(len(columnas), 1)
+    prof_int = prof - FONDO_PLACARD if s["tiene_placard"] else prof
+    yf = prof - prof_int               # frente del interior (detrás de los rieles si hay placard)
+    w_int = ancho - 2 * esp
+    w_hueco = (w_int - (n - 1) * esp) / n
+    descuento_guia, _ = params_corredera(s["tipo_corredera"])
+    lg = largo_guia(prof_int)
+    cajas = {c: [] for c in CATEGORIAS}
+
+    def caja(cat, x0, x1, y0, y1, z0, z1): cajas[cat].append((x0, y0, z0, x1, y1, z1))
+
+    # Casco
+    caja("Casco", 0, esp, 0, prof, 0, alto); caja("Casco", ancho - esp, ancho, 0, prof, 0, alto)
+    caja("Casco", esp, ancho - esp, 0, prof, zocalo, zocalo + esp); caja("Casco", esp, ancho - esp, 0, prof, alto - esp, alto)
+    caja("Fondo", 7.5, ancho - 7.5, prof, prof + s["fondo_esp"], 7.5, alto - 7.5)
+    for i in range(1, n):
+        x = esp + i * w_hueco + (i - 1) * esp
+        caja("Casco", x, x + esp, yf, prof, zocalo + esp, alto - esp)
+
+    def estantes(x0, x1, z0, z1, cant, pint, cat="Interior"):
+        paso = (z1 - z0) / (cant + 1)
+        for k in range(cant): z = z0 + paso * (k + 1); caja(cat, x0 + 1, x1 - 1, prof - pint, prof, z - esp / 2, z + esp / 2)
+
+    def cajonera(x0, x1, z0, h_disp, cant):
+        hf = (h_disp - (cant - 1) * LUZ_CAJONES) / cant
+        hl = lateral_cajon(hf)
+        wc = w_hueco - descuento_guia * 2 - 36
+        bx0 = x0 + (w_hueco - wc - 36) / 2; bx1 = bx0 + wc + 36
+        for k in range(cant):
+            zf = z0 + k * (hf + LUZ_CAJONES)
+            caja("Frentes", x0 + 2, x1 - 2, yf - esp, yf, zf, zf + hf)
+            if not hl: continue
+            zb = zf + 15
+            caja("Cajones", bx0, bx0 + 18, yf, yf + lg, zb, zb + hl); caja("Cajones", bx1 - 18, bx1, yf, yf + lg, zb, zb + hl)
+            caja("Cajones", bx0 + 18, bx1 - 18, yf + lg - 18, yf + lg, zb, zb + hl)
+            caja("Cajones", bx0 + 18, bx1 - 18, yf, yf + lg, zb, zb + 3)
+            caja("Herrajes", x0, bx0, yf, yf + lg, zb + 5, zb + 40); caja("Herrajes", bx1, x1, yf, yf + lg, zb + 5, zb + 40)
+
+    def puerta(x0, x1, z0, h, data, interior_z=None):
+        montaje = data.get("montaje", "Externa")
+        externa = "Externa" in montaje
+        d = 4 if externa else 6
+        y0, y1 = (yf - esp, yf) if externa else (yf, yf + esp)
+        if data.get("doble"):
+            wa = (w_hueco - d - 2) / 2
+            caja("Frentes", x0 + d / 2, x0 + d / 2 + wa, y0, y1, z0 + d / 2, z0 + h - d / 2)
+            caja("Frentes", x1 - d / 2 - wa, x1 - d / 2, y0, y1, z0 + d / 2, z0 + h - d / 2)
+        else:
+            caja("Frentes", x0 + d / 2, x1 - d / 2, y0, y1, z0 + d / 2, z0 + h - d / 2)
+        din = data.get("interior") or {}
+        pint = prof_int - 20 if externa else prof_int - 40
+        za, zb = interior_z or (z0, z0 + h)
+        if din.get("tipo") == "Estantes": estantes(x0, x1, za, zb, din["cant"], pint)
+        elif din.get("tipo") == "Cubos":
+            for c in range(1, din["cols"]):
+                x = x0 + (x1 - x0) * c / din["cols"]; caja("Interior", x - esp / 2, x + esp / 2, prof - pint, prof, za, zb)
+            estantes(x0, x1, za, zb, din["rows"] - 1, pint)
+
+    def bloque(tipo, data, x0, x1, z0, z1, h_disp):
+        if tipo == "Cajonera" and data.get("cant"): cajonera(x0, x1, z0, h_disp, data["cant"])
+        elif "Puerta" in tipo: puerta(x0, x1, z0, h_disp, data, (max(z0, zocalo + esp), min(z1, alto - esp)))
+        elif tipo == "Estantes": estantes(x0, x1, max(z0, zocalo + esp), min(z1, alto - esp), data.get("cant", 0), prof_int - 20)
+        elif tipo == "Barral":
+            zt = min(z1, alto - esp) - 60; ym = (yf + prof) / 2
+            caja("Herrajes", x0 + 5, x1 - 5, ym - 12, ym + 12, zt - 25, zt)
+
+    # Columnas
+    for i, conf in enumerate(columnas):
+        x0 = esp + i * (w_hueco + esp); x1 = x0 + w_hueco
+        d_inf, d_sup = conf["inf_data"], conf["sup_data"]
+        dividida = "Dividida" in conf["modo"]
+        h_inf = d_inf.get("alto", 0)
+        if dividida:
+            z_div = zocalo + h_inf
+            caja("Interior", x0, x1, yf, prof, z_div - esp, z_div)
+            bloque(conf["inf_tipo"], d_inf, x0, x1, zocalo, z_div - esp, h_inf - esp)
+        else:
+            bloque(conf["inf_tipo"], d_inf, x0, x1, zocalo, alto, alto - zocalo if "Puerta" in conf["inf_tipo"] else h_inf)
+        z_sup = zocalo + h_inf
+        if alto - z_sup > 0: bloque(conf["sup_tipo"], d_sup, x0, x1, z_sup, alto, alto - z_sup)
+
+    # Placard: hojas en dos rieles alternados delante del interior
+    if s["tiene_placard"] and s["hojas_placard"]:
+        hojas = s["hojas_placard"]
+        wa = (w_int + (hojas - 1) * 30) / hojas
+        for k in range(hojas):
+            xh = esp + k * (wa - 30); yh = 10 + (k % 2) * 35
+            caja("Placard", xh, xh + wa, yh, yh + esp, zocalo + esp + 10, alto - esp - 10)
+        caja("Herrajes", esp, ancho - esp, 5, 80, zocalo + esp, zocalo + esp + 8)
+        caja("Herrajes", esp, ancho - esp, 5, 80, alto - esp - 8, alto - esp)
+
+    return {c: np.array(v, dtype=np.float64).reshape(-1, 6) for c, v in cajas.items()}
+
+
+def cajas_proyecto(specs, explotado=False, baja=False):
+    """Cajas por categoría de varios módulos, uno al lado del otro.
+
+    `explotado` separa cada pieza del centro de su módulo (y adelanta frentes
+    y hojas); `baja` omite herrajes, cajas de cajón y piezas chicas.
+    """
+    grupos = {c: [] for c in CATEGORIAS}
+    x = 0.0
+    for spec in specs:
+        cajas = cajas_mueble(spec)
+        s = completar_spec(spec)
+        centro = np.array([s["ancho"] / 2, s["prof"] / 2, s["alto"] / 2])
+        for cat, c in cajas.items():
+            if baja:
+                if cat in ("Herrajes", "Cajones"): continue
+                dim = np.sort(c[:, 3:] - c[:, :3], axis=1)
+                c = c[dim[:, 1] * dim[:, 2] / 1e6 >= PIEZA_CHICA]
+            if explotado and len(c):
+                d = EXPLOSION * ((c[:, :3] + c[:, 3:]) / 2 - centro)
+                if cat in ("Frentes", "Placard"): d[:, 1] -= AVANCE_FRENTES * (2 if cat == "Placard" else 1)
+                c = c + np.hstack([d, d])
+            grupos[cat].append(c + [x, 0, 0, x, 0, 0])
+        x += s["ancho"] * (1 + (2 * EXPLOSION if explotado else 0)) + SEPARACION
+    return {c: np.vstack(v) if v else np.zeros((0, 6)) for c, v in grupos.items()}
+
+
+# ==============================================================================
+# 2. MALLAS
+# ==============================================================================
+def malla(cajas):
+    """Vértices `(x, y, z)` e índices `(i, j, k)` de todas las cajas en una sola malla."""
+    lo, hi = cajas[:, None, :3], cajas[:, None, 3:]
+    v = (lo + _VERTICES[None] * (hi - lo)).reshape(-1, 3)
+    t = (_TRIANGULOS[None] + 8 * np.arange(len(cajas))[:, None, None]).reshape(-1, 3)
+    return v.T, t.T
+
+
+def aristas(cajas):
+    """Contorno de cada caja como una sola polilínea cortada con `None`."""
+    lo, hi = cajas[:, None, :3], cajas[:, None, 3:]
+    v = lo + _VERTICES[_ARISTAS][None] * (hi - lo)
+    v = np.concatenate([v, np.full((len(cajas), 1, 3), np.nan)], axis=1).reshape(-1, 3)
+    return v.T
+
+
+def figura_3d(specs, explotado=False, baja=False, titulo="Vista 3D"):
+    """Figura con una `Mesh3d` por categoría (y los contornos en alta resolución)."""
+    import plotly.graph_objects as go
+    grupos = cajas_proyecto(specs, explotado, baja)
+    fig = go.Figure()
+    for cat, cajas in grupos.items():
+        if not len(cajas): continue
+        (x, y, z), (i, j, k) = malla(cajas)
+        color, opacidad = CATEGORIAS[cat]
+        fig.add_trace(go.Mesh3d(x=x, y=y, z=z, i=i, j=j, k=k, color=color, opacity=opacidad, flatshading=True, name=cat,
+                                showlegend=True, hoverinfo="name", lighting=dict(ambient=0.55, diffuse=0.8, specular=0.1)))
+    if not baja:
+        todas = np.vstack([c for c in grupos.values() if len(c)])
+        x, y, z = aristas(todas)
+        fig.add_trace(go.Scatter3d(x=x, y=y, z=z, mode="lines", line=dict(color="#4D4D4D", width=1), hoverinfo="skip", showlegend=False))
+    ejes = dict(visible=False)
+    fig.update_layout(margin=dict(t=30, b=0, l=0, r=0), height=450, title=titulo, legend=dict(orientation="h"),
+                      scene=dict(xaxis=ejes, yaxis=ejes, zaxis=ejes, aspectmode="data", camera=dict(eye=dict(x=-1.1, y=-1.8, z=0.8))))
+    return fig